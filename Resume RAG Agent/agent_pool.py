@@ -0,0 +1,216 @@
+import os
+import time
+import threading
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence
+
+import httpx
+
+from setup import setup_agents, setup_coordinator
+from score import configure_scoring_agent_for_consistency
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", 4))
+# Seconds a session waits for a free agent set before a temporary one is built for it
+AGENT_LEASE_TIMEOUT = float(os.getenv("AGENT_LEASE_TIMEOUT", 30))
+AGENT_SHARED_HTTP_CLIENT = os.getenv("AGENT_SHARED_HTTP_CLIENT", "1") == "1"
+
+class SharedHTTPClient(httpx.Client):
+    """httpx client that survives the deepcopy of llm_config each agent makes, so all agents really share it"""
+
+    def __deepcopy__(self, memo):
+        return self
+
+class AgentSet:
+    """
+    The agents of one analysis: the five setup_agents returns, plus a second coordinator for the job
+    extraction, which runs concurrently with resume extraction and must not share the first one's chat state
+    """
+
+    def __init__(self, resume_agent, scoring_agent, job_agent, improvement_agent, coordinator, job_coordinator):
+        self.resume_agent = resume_agent
+        self.scoring_agent = scoring_agent
+        self.job_agent = job_agent
+        self.improvement_agent = improvement_agent
+        self.coordinator = coordinator
+        self.job_coordinator = job_coordinator
+        self.pooled = True
+
+    def agents(self) -> List:
+        return [self.resume_agent, self.scoring_agent, self.job_agent, self.improvement_agent,
+                self.coordinator, self.job_coordinator]
+
+    def reset(self):
+        """Clear per-conversation state (chat histories, reply counters) before the next lease"""
+        for agent in self.agents():
+            agent.reset()
+
+def build_agent_set(http_client: httpx.Client = None) -> AgentSet:
+    agents = AgentSet(*setup_agents(http_client=http_client),
+                      job_coordinator=setup_coordinator("JobCoordinator", http_client=http_client))
+    # Scoring determinism is configured once per agent, not on every run
+    agents.scoring_agent = configure_scoring_agent_for_consistency(agents.scoring_agent)
+    return agents
+
+
+class AgentPool:
+    """
+    Process-wide pool of agent sets leased to concurrent sessions
+    Sets are built on demand up to `size` and reused across reruns and sessions, all sharing one HTTP
+    client so connections stay pooled. A released set is reset before it is handed out again, and not before
+    the stage threads still using it have finished. When every set is busy for longer than `lease_timeout`,
+    the caller gets a temporary set instead of blocking.
+    """
+
+    def __init__(self, factory: Callable[..., AgentSet] = build_agent_set, size: int = AGENT_POOL_SIZE,
+                 lease_timeout: float = AGENT_LEASE_TIMEOUT, shared_http_client: bool = AGENT_SHARED_HTTP_CLIENT):
+        self.factory = factory
+        self.size = size
+        self.lease_timeout = lease_timeout
+        self.http_client = SharedHTTPClient(timeout=120) if shared_http_client else None
+        self._idle = []
+        self._built = 0
+        self._condition = threading.Condition()
+        self.metrics = {"built": 0, "construction_seconds": 0.0, "leases": 0, "waits": 0, "overflow": 0,
+                        "deferred_releases": 0, "http_client_fallbacks": 0}
+
+    def _build(self) -> AgentSet:
+        start = time.perf_counter()
+        try:
+            agents = self.factory(http_client=self.http_client)
+        except Exception as e:
+            if self.http_client is None:
+                raise
+            # Every later set is built without it too: connections are no longer shared between agents
+            print(f"WARNING: Could not build agents on the shared HTTP client ({e!r}); "
+                  f"falling back to one HTTP client per agent for the rest of this process")
+            with self._condition:
+                self.metrics["http_client_fallbacks"] += 1
+            self.http_client = None
+            agents = self.factory(http_client=None)
+        elapsed = time.perf_counter() - start
+        with self._condition:
+            self.metrics["built"] += 1
+            self.metrics["construction_seconds"] += elapsed
+        return agents
+
+    def _discard(self):
+        """Give back the slot of a set that was never built or can't be reused"""
+        with self._condition:
+            self._built -= 1
+            self._condition.notify()
+
+    def warm(self, count: int = 1) -> "AgentPool":
+        """Build up to `count` sets ahead of the first lease, so construction is paid at startup"""
+        while True:
+            with self._condition:
+                if self._built >= min(count, self.size):
+                    return self
+                self._built += 1
+            try:
+                agents = self._build()
+            except Exception:
+                self._discard()
+                raise
+            with self._condition:
+                self._idle.append(agents)
+                self._condition.notify()
+
+    def acquire(self) -> AgentSet:
+        deadline = time.monotonic() + self.lease_timeout
+        with self._condition:
+            self.metrics["leases"] += 1
+            while not self._idle and self._built >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.metrics["waits"] += 1
+                self._condition.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            pooled = self._built < self.size
+            if pooled:
+                self._built += 1
+            else:
+                self.metrics["overflow"] += 1
+        if not pooled:
+            print("Agent pool exhausted, building a temporary agent set")
+        try:
+            agents = self._build()
+        except Exception:
+            if pooled:
+                self._discard()
+            raise
+        agents.pooled = pooled
+        return agents
+
+    def release(self, agents: AgentSet, wait_for: Sequence[Future] = ()):
+        """Return a set to the pool; with `wait_for` (e.g. a pipeline run's abandoned stages), once those finish"""
+        pending = [future for future in wait_for if not future.done()]
+        if not pending:
+            self._return(agents)
+            return
+        with self._condition:
+            self.metrics["deferred_releases"] += 1
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def finished(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._return(agents)
+
+        for future in pending:
+            future.add_done_callback(finished)
+
+    def _return(self, agents: AgentSet):
+        if not agents.pooled:
+            return
+        try:
+            agents.reset()
+        except Exception as e:
+            # A set that can't be reset is dropped and rebuilt on demand
+            print(f"Discarding agent set that failed to reset: {e}")
+            self._discard()
+            return
+        with self._condition:
+            self._idle.append(agents)
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self):
+        agents = self.acquire()
+        try:
+            yield agents
+        finally:
+            self.release(agents)
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            built = self.metrics["built"]
+            return {
+                **self.metrics,
+                "idle": len(self._idle),
+                "in_use": self._built - len(self._idle),
+                "avg_construction_ms": self.metrics["construction_seconds"] / built * 1000 if built else 0.0
+            }
+
+    def close(self):
+        if self.http_client is not None:
+            self.http_client.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_agent_pool() -> AgentPool:
+    """The process-wide pool, created and warmed with one agent set on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AgentPool().warm(1)
+            print(f"Agent pool ready: {_pool.stats()['avg_construction_ms']:.0f} ms to build one agent set")
+        return _pool
@@ -0,0 +1,50 @@
+import threading
+
+from typing import Callable, Dict
+
+class AnalysisContext:
+    """
+    Memo of RAG section results for the lifetime of one analysis
+    Sections are keyed by name only: whichever stage asks for a section first generates it from its own
+    inputs, and every later request in the same analysis reuses that text. Concurrent requests for the
+    same section wait for the first one instead of generating it twice. Empty results are not kept,
+    so a failed generation is retried by the next caller. Stage-internal values (e.g. the best practices
+    a resume extraction read) are memoized with `private=True`, outside the sections namespace.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.private = {}
+        self.metrics = {"generated": 0, "reused": 0}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _section_lock(self, section: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(section, threading.Lock())
+
+    def memoize(self, section: str, compute: Callable[[], str], private: bool = False) -> str:
+        """Return the section's text, generating it with `compute` only the first time"""
+        results = self.private if private else self.results
+        with self._section_lock(f"private:{section}" if private else section):
+            if section in results:
+                self.metrics["reused"] += 1
+                return results[section]
+            text = compute()
+            if text:
+                results[section] = text
+                self.metrics["generated"] += 1
+            return text
+
+    def store(self, section: str, text: str):
+        """Record a section produced outside memoize (e.g. assembled from a stream)"""
+        if text:
+            with self._lock:
+                self.results.setdefault(section, text)
+
+    def __contains__(self, section: str) -> bool:
+        return section in self.results
+
+    def sections(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.results)
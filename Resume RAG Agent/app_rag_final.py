@@ -15,6 +15,7 @@ import PyPDF2 as pdf
 import json
 import re
 import asyncio
+import threading
 import requests
 import google.generativeai as genai
 import chromadb
@@ -27,13 +28,17 @@ from autogen import AssistantAgent, UserProxyAgent
 from typing import List, Dict, Any
 
 from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-from rag import RAGKnowledgeBase
-from db import SessionLocal, User, Resume, JobDescription, Score, get_user_resumes, get_user_job_descriptions, get_scores_for_resume
-from setup import setup_agents
-from process import extract_text_from_pdf, extract_text_from_docx, extract_text_from_file, process_resume, process_job_description
-from score import score_resume, configure_scoring_agent_for_consistency
-from feedback import improve_resume, display_section, save_resume, save_job_description, save_score, display_rag_insights, determine_top_skill, search_jobs_with_duckduckgo
+from rag import RAGKnowledgeBase, SECTION_UNAVAILABLE
+from db import SessionLocal, User, Resume, JobDescription, Score, get_user_resumes, get_user_job_descriptions, get_scores_for_resume, get_analysis_insights
+from agent_pool import get_agent_pool
+from process import process_resume, process_job_description
+from extract import extract_text
+from score import score_resume
+from pipeline import Pipeline
+from analysis_context import AnalysisContext
+from feedback import improve_resume, display_section, persist_analysis, persist_insights, analysis_key, display_rag_insights, determine_top_skill, search_jobs_with_duckduckgo
 
 load_dotenv() 
 
@@ -50,9 +55,9 @@ async def main():
         with st.spinner("Initializing AI Knowledge Base..."):
             st.session_state.knowledge_base = RAGKnowledgeBase()
 
-    # Setup agents
+    # Agents are built once per process and leased per analysis
     with st.spinner("Initializing agents..."):
-        resume_agent, scoring_agent, job_agent, improvement_agent, coordinator = setup_agents()
+        agent_pool = get_agent_pool()
     
     if "user_id" not in st.session_state:
         st.session_state.user_id = 1  
@@ -84,84 +89,124 @@ async def main():
         jd_file = st.file_uploader("Upload Job Description (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"], key="jd_file")
     
     if jd_file is not None:
-        file_type = jd_file.type
-        if file_type == "application/pdf":
-            reader = pdf.PdfReader(jd_file)
-            jd = "\n".join([page.extract_text() for page in reader.pages])
-        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            jd = mammoth.extract_raw_text(jd_file).value
-        elif file_type == "text/plain":
-            jd = jd_file.read().decode("utf-8")
+        try:
+            jd = extract_text(jd_file)
+        except ValueError as e:
+            st.error(str(e))
         
+    # Stored results stay valid until the resume or JD changes
+    current_key = analysis_key(uploaded_file.getvalue(), jd) if uploaded_file is not None and jd else None
+    if current_key and st.session_state.get("analysis_key") not in (None, current_key):
+        st.session_state.resume_processed = False
+        for key in ("rag_insights", "rag_context", "analysis_context", "analysis_key", "pending_insights"):
+            st.session_state.pop(key, None)
+
     submit = st.button("Analyze my Resume")
 
     if submit:
             if uploaded_file is not None and jd:
                 
                 # Extract text from the resume
-                if uploaded_file.type == "application/pdf":
-                    resume_text = extract_text_from_pdf(uploaded_file)
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    resume_text = extract_text_from_docx(uploaded_file)
-                elif uploaded_file.type == "text/plain":
-                    resume_text = extract_text_from_file(uploaded_file)
-                else:
-                    st.error("Unsupported file type. Please upload a PDF or DOCX file.")
+                try:
+                    resume_text = extract_text(uploaded_file)
+                except ValueError as e:
+                    st.error(str(e))
                     return
                 
-                # Process the resume and job description
-                resume_data = process_resume(resume_text, resume_agent, coordinator,knowledge_base)
-                job_data = process_job_description(jd, job_agent, coordinator)
-                
-                # Score the resume
-                scoring_agent = configure_scoring_agent_for_consistency(scoring_agent)
-                score_data = score_resume(resume_data, job_data, scoring_agent, coordinator,knowledge_base)
-                
-                # Improve the resume
-                improvement_data = improve_resume(resume_data, job_data, score_data, improvement_agent, coordinator,knowledge_base)
-                
-                # Store RAG insights in database
-                rag_insights = knowledge_base.run_complete_rag_analysis(
-                resume_text, jd, score_data.get("overall_score", 50), resume_data.get("Skills", [])
-                )
+                # Run the analysis as a dependency graph: independent stages overlap
+                script_context = get_script_run_ctx()
+                # Every RAG section is generated at most once for this analysis, whichever stage asks first
+                analysis_context = AnalysisContext()
+                for name, text in get_analysis_insights(current_key).items():
+                    if text != SECTION_UNAVAILABLE:
+                        analysis_context.store(name, text)
+                agents = agent_pool.acquire()
+                run = None
+                try:
+                    analysis = (
+                        Pipeline(on_thread_start=lambda: add_script_run_ctx(threading.current_thread(), script_context))
+                        .add("resume_data", lambda resume_text, rag_context: process_resume(
+                                resume_text, agents.resume_agent, agents.coordinator, knowledge_base, analysis_context, prefetched=rag_context),
+                             inputs=["resume_text", "rag_context"], optional=["rag_context"], timeout=120)
+                        .add("job_data", lambda jd: process_job_description(jd, agents.job_agent, agents.job_coordinator),
+                             inputs=["jd"], timeout=120)
+                        # One batched retrieval for the resume best practices and industry context
+                        .add("rag_context", lambda jd: knowledge_base.prefetch_text_sections(jd),
+                             inputs=["jd"], timeout=30)
+                        .add("score_data", lambda resume_data, job_data, rag_context: score_resume(
+                                resume_data, job_data, agents.scoring_agent, agents.coordinator, knowledge_base, analysis_context, prefetched=rag_context),
+                             inputs=["resume_data", "job_data", "rag_context"], optional=["rag_context"], timeout=180)
+                        .add("improvement_data", lambda resume_data, job_data, score_data: improve_resume(
+                                resume_data, job_data, score_data, agents.improvement_agent, agents.coordinator, knowledge_base),
+                             inputs=["resume_data", "job_data", "score_data"], timeout=180)
+                    )
+                    run = await analysis.run(resume_text=resume_text, jd=jd)
+                finally:
+                    # Stages abandoned by a timeout may still be talking to these agents
+                    agent_pool.release(agents, wait_for=run.abandoned if run is not None else ())
+                print(run.format_report())
+                # The prefetch is optional: stages retrieve on their own without it
+                failed = [error for name, error in run.errors.items() if name != "rag_context"]
+                if failed:
+                    st.error(f"Analysis failed: {'; '.join(str(error) for error in failed)}")
+                    return
+                resume_data = run.outputs["resume_data"]
+                score_data = run.outputs["score_data"]
+                improvement_data = run.outputs["improvement_data"]
 
                 # Store in session state
                 st.session_state.resume_data = resume_data
                 st.session_state.score_data = score_data
                 st.session_state.improvement_data = improvement_data
-                st.session_state.rag_insights = rag_insights
+                st.session_state.pop("rag_insights", None)
+                st.session_state.rag_context = run.outputs.get("rag_context")
+                st.session_state.analysis_context = analysis_context
+                st.session_state.analysis_key = current_key
+                st.session_state.resume_text = resume_text
                 st.session_state.job_description = jd
                 st.session_state.resume_processed = True
 
-                # Save to database
+                # Save resume, JD and score to database in the background; the RAG insights below
+                # are attached to this analysis once they have finished streaming
                 user_id = 1  
-                resume_id = save_resume(user_id, uploaded_file, resume_text, resume_data)
-                job_id = save_job_description(user_id, "JD Input", jd)
-                score_id = save_score(resume_id, job_id, score_data)
+                persist_analysis(
+                    user_id=user_id, file_name=uploaded_file.name, resume_text=resume_text,
+                    resume_data=resume_data, jd_title="JD Input", jd_text=jd,
+                    score_data=score_data, analysis_key=current_key
+                )
+                st.session_state.pending_insights = current_key
             else:
                 st.error("Please upload a resume and provide a job description.")
-
-                # Store RAG insights
-                knowledge_base.store_analysis_in_database(user_id, resume_id, job_id, 
-                                                    score_data.get("score", 50), rag_insights)
         
     if st.session_state.resume_processed:
                 # Display results
                 display_section("ATS Score", st.session_state.score_data.get("overall_score", []))
                 display_section("Feedback", st.session_state.score_data.get("feedback", []))
                 display_section("Recommendations", st.session_state.score_data.get("recommendations", []))
+                if st.session_state.resume_data.get("Formatting Issues"):
+                    display_section("Formatting Issues", st.session_state.resume_data["Formatting Issues"])
                 display_section("Format Improvements", st.session_state.improvement_data.get("format_improvements", []))
                 display_section("Skill Gaps", st.session_state.improvement_data.get("skill_gaps", []))
                 display_section("ATS Optimizations", st.session_state.improvement_data.get("ATS_optimizations", []))
                 display_section("Actionable Steps", st.session_state.improvement_data.get("actionable_steps", []))
                 display_section("Missing Keywords", st.session_state.improvement_data.get("missing_keywords", []))
 
-                display_rag_insights(
+                # Streams sections as they are generated; reruns render from the stored copy
+                st.session_state.rag_insights = display_rag_insights(
                     st.session_state.knowledge_base,
                     st.session_state.resume_data, 
-                    st.session_state.job_description
+                    st.session_state.job_description,
+                    st.session_state.get("analysis_context"),
+                    stored=st.session_state.get("rag_insights"),
+                    resume_text=st.session_state.get("resume_text"),
+                    prefetched=st.session_state.get("rag_context")
                 )
 
+                # Attach the streamed RAG insights to the analysis saved above
+                pending = st.session_state.pop("pending_insights", None)
+                if pending:
+                    persist_insights(pending, st.session_state.rag_insights)
+
                 st.subheader("🌍 Search for Open Jobs Online")
 
                 city = st.text_input("Enter your city (e.g., Auckland, New York, London)")
@@ -169,7 +214,8 @@ async def main():
                     if city:
                         resume_data = st.session_state.resume_data
                         if resume_data:
-                            top_skill = determine_top_skill(resume_data, coordinator, resume_agent)
+                            with agent_pool.lease() as agents:
+                                top_skill = determine_top_skill(resume_data, agents.coordinator, agents.resume_agent)
                             query = f"{top_skill} jobs in {city}"
                         else:
                             query = f"jobs in {city}"
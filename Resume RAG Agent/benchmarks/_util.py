@@ -0,0 +1,11 @@
+"""Helpers shared by the benchmark scripts"""
+import os
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
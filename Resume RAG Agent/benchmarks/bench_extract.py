@@ -0,0 +1,88 @@
+"""
+Serial versus page-parallel PDF extraction, and cached re-extraction, over a synthetic multi-page corpus.
+
+    python benchmarks/bench_extract.py --files 20 --pages 4 40 --workers 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXTRACT_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "extract_cache.db"))
+
+import extract
+
+WORDS = ("python sql kubernetes leadership analytics delivered migrated pipeline customers revenue "
+         "designed reduced latency platform mentoring stakeholders roadmap testing cloud security").split()
+
+def make_pdf(pages: int, lines: int = 45, seed: int = 0) -> bytes:
+    """Minimal text PDF: one Helvetica content stream per page"""
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        body = "BT /F1 10 Tf 50 800 Td 12 TL " + " ".join(
+            "(" + " ".join(rng.choices(WORDS, k=12)) + ") '" for _ in range(lines)
+        ) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    output, offsets = [b"%PDF-1.4\n"], []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(sum(map(len, output)))
+        output.append(f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = sum(map(len, output))
+    output.append(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    output.extend(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output.append(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return b"".join(output)
+
+def concatenating_extract(data: bytes) -> str:
+    """The previous per-call approach: serial pages joined with +="""
+    import io
+    reader = extract.pdf.PdfReader(io.BytesIO(data))
+    text = ""
+    for page in range(len(reader.pages)):
+        text += str(reader.pages[page].extract_text())
+    return text
+
+def timed(function, corpus) -> float:
+    start = time.perf_counter()
+    for data in corpus:
+        function(data)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40])
+    parser.add_argument("--workers", type=int, default=extract.EXTRACT_WORKERS)
+    args = parser.parse_args()
+
+    # Start the worker pool outside the timings
+    extract.extract_pdf(make_pdf(extract.PARALLEL_MIN_PAGES, seed=-1), workers=args.workers)
+
+    for pages in args.pages:
+        corpus = [make_pdf(pages, seed=seed) for seed in range(args.files)]
+        baseline = timed(concatenating_extract, corpus)
+        serial = timed(lambda data: extract.extract_pdf(data, max_pages=pages, workers=1), corpus)
+        parallel = timed(lambda data: extract.extract_pdf(data, max_pages=pages, workers=args.workers), corpus)
+        first = timed(lambda data: extract.extract_text(data, "pdf", max_pages=pages), corpus)
+        cached = timed(lambda data: extract.extract_text(data, "pdf", max_pages=pages), corpus)
+
+        print(f"{args.files} PDFs x {pages} pages ({sum(map(len, corpus)) / 2**20:.1f} MB)")
+        print(f"  serial, += join:     {baseline / args.files * 1000:8.1f} ms/file")
+        print(f"  serial, list join:   {serial / args.files * 1000:8.1f} ms/file")
+        print(f"  parallel ({args.workers} procs): {parallel / args.files * 1000:8.1f} ms/file")
+        print(f"  extract_text cold:   {first / args.files * 1000:8.1f} ms/file")
+        print(f"  extract_text cached: {cached / args.files * 1000:8.3f} ms/file")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Indexing and scoring throughput of BatchPreScorer against the per-pair keyword overlap in score_resume.
+
+    python benchmarks/bench_prescore.py --sizes 10000 100000 --jds 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prescore import BatchPreScorer
+
+def synthetic_resumes(count: int, vocabulary: list, length: int, seed: int = 42):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like term frequencies
+    return [
+        {
+            "Name": f"candidate {i}",
+            "Skills": rng.choices(vocabulary, weights, k=20),
+            "Experience": " ".join(rng.choices(vocabulary, weights, k=length))
+        }
+        for i in range(count)
+    ]
+
+def pairwise_overlap(resume, job) -> float:
+    """The word-set overlap score_resume computes for a single pair"""
+    job_text = json.dumps(job, sort_keys=True)
+    resume_text = json.dumps(resume, sort_keys=True)
+    job_keywords = set(word.lower().strip() for word in job_text.split() if len(word) > 3 and word.isalpha())
+    resume_keywords = set(word.lower().strip() for word in resume_text.split() if len(word) > 3 and word.isalpha())
+    return min(100, len(job_keywords & resume_keywords) / max(len(job_keywords), 1) * 100)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--jds", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--length", type=int, default=150)
+    parser.add_argument("--top-k", type=int, default=50)
+    args = parser.parse_args()
+
+    vocabulary = [f"term{i}" for i in range(args.vocabulary)]
+    rng = random.Random(7)
+    jobs = [{"title": "role", "skills": rng.sample(vocabulary[:2000], 40)} for _ in range(args.jds)]
+
+    for size in args.sizes:
+        resumes = synthetic_resumes(size, vocabulary, args.length)
+
+        start = time.perf_counter()
+        scorer = BatchPreScorer().fit(resumes)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scorer.score(jobs)
+        score_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scorer.shortlist(jobs[0], args.top_k)
+        shortlist_seconds = time.perf_counter() - start
+
+        sample = resumes[:min(size, 2000)]
+        start = time.perf_counter()
+        for resume in sample:
+            pairwise_overlap(resume, jobs[0])
+        pairwise_per_resume = (time.perf_counter() - start) / len(sample)
+
+        print(f"{size} resumes, {len(scorer.vocabulary)} terms, nnz {scorer.weights.nnz}")
+        print(f"  fit:                 {fit_seconds:.2f} s ({size / fit_seconds:,.0f} resumes/s)")
+        print(f"  score {args.jds} JDs:         {score_seconds * 1000:.1f} ms ({size * args.jds / score_seconds:,.0f} pairs/s)")
+        print(f"  shortlist top {args.top_k}:    {shortlist_seconds * 1000:.1f} ms")
+        print(f"  per-pair overlap:    {pairwise_per_resume * size * args.jds:.2f} s estimated for the same {size * args.jds} pairs")
+
+if __name__ == "__main__":
+    main()
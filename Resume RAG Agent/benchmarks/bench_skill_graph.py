@@ -0,0 +1,65 @@
+"""
+Build time, memory footprint and lookup latency of SkillGraph on a synthetic taxonomy.
+
+    python benchmarks/bench_skill_graph.py --skills 100000 --degree 6 --depth 2
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_graph import SkillGraph
+from _util import rss_mb
+
+def synthetic_records(count: int, degree: int, industries: int, seed: int = 42):
+    rng = random.Random(seed)
+    names = [f"skill {i}" for i in range(count)]
+    industry_names = [f"industry {i}" for i in range(industries)]
+    for name in names:
+        yield {
+            "skill": name,
+            "related_skills": rng.sample(names, degree),
+            "industry_relevance": rng.sample(industry_names, 3)
+        }
+
+def per_call_ns(function, arguments) -> float:
+    start = time.perf_counter_ns()
+    for args in arguments:
+        function(*args)
+    return (time.perf_counter_ns() - start) / len(arguments)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skills", type=int, default=100000)
+    parser.add_argument("--degree", type=int, default=6)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--industries", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.skills, args.degree, args.industries))
+    before = rss_mb()
+    start = time.perf_counter()
+    graph = SkillGraph.from_records(records, depth=args.depth)
+    build_seconds = time.perf_counter() - start
+    memory = rss_mb() - before
+
+    rng = random.Random(7)
+    names = list(graph.closures)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.lookups)]
+    singles = [(rng.choice(names),) for _ in range(args.lookups)]
+    closure_sizes = [len(closure) for closure in graph.closures.values()]
+
+    print(f"skills:            {len(names)}")
+    print(f"avg closure size:  {sum(closure_sizes) / len(closure_sizes):.1f} (depth {args.depth})")
+    print(f"build time:        {build_seconds:.2f} s")
+    print(f"memory:            {memory:.1f} MB RSS")
+    print(f"is_adjacent:       {per_call_ns(graph.is_adjacent, pairs):.0f} ns/lookup")
+    print(f"industries:        {per_call_ns(graph.industries, singles):.0f} ns/lookup")
+    print(f"related:           {per_call_ns(graph.related, singles):.0f} ns/lookup")
+
+if __name__ == "__main__":
+    main()
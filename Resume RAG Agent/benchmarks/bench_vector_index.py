@@ -0,0 +1,80 @@
+"""
+Compare top-k query latency and resident memory of the NumPy index against Chroma.
+
+    python benchmarks/bench_vector_index.py --sizes 1000 5000 --dim 1536
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import NumpyVectorIndex
+from _util import rss_mb
+
+def time_queries(query, queries: np.ndarray, n_results: int) -> tuple:
+    latencies = []
+    for vector in queries:
+        start = time.perf_counter()
+        query(vector, n_results)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def bench_numpy(ids, vectors, documents, metadatas, queries, n_results, dtype):
+    before = rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index")
+        NumpyVectorIndex.build(ids, vectors, documents, metadatas, dtype=dtype).save(path)
+        index, _ = NumpyVectorIndex.load(path)
+        p50, p99 = time_queries(lambda v, k: index.search([v], k), queries, n_results)
+        return p50, p99, rss_mb() - before
+
+def bench_chroma(ids, vectors, documents, metadatas, queries, n_results):
+    import chromadb
+
+    before = rss_mb()
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench_{len(ids)}", metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(ids), 1000):
+        end = start + 1000
+        collection.add(
+            ids=ids[start:end],
+            embeddings=vectors[start:end].tolist(),
+            documents=documents[start:end],
+            metadatas=metadatas[start:end]
+        )
+    p50, p99 = time_queries(
+        lambda v, k: collection.query(query_embeddings=[v.tolist()], n_results=k), queries, n_results
+    )
+    return p50, p99, rss_mb() - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'backend':<16}{'docs':>8}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+        ids = [f"doc_{i}" for i in range(size)]
+        documents = [f"document {i}" for i in range(size)]
+        metadatas = [{"category": f"c{i % 10}", "rank": i} for i in range(size)]
+
+        for dtype in ("float32", "float16", "int8"):
+            p50, p99, rss = bench_numpy(ids, vectors, documents, metadatas, queries, args.n_results, dtype)
+            print(f"{'numpy-' + dtype:<16}{size:>8}{p50:>10.3f}{p99:>10.3f}{rss:>10.1f}")
+        if not args.skip_chroma:
+            p50, p99, rss = bench_chroma(ids, vectors, documents, metadatas, queries, args.n_results)
+            print(f"{'chroma':<16}{size:>8}{p50:>10.3f}{p99:>10.3f}{rss:>10.1f}")
+
+if __name__ == "__main__":
+    main()
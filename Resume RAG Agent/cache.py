@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by entry count"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._data)}
+
+
+class DiskCache:
+    """
+    SQLite-backed key/value cache with least-recently-used eviction and optional TTL
+    Reads don't write: access times of hits are buffered and flushed in one batch, and the row count is
+    tracked in memory so eviction doesn't count the table on every write. Expired rows are dropped when
+    read and swept at most once per `sweep_interval` seconds.
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 100000, ttl: Optional[float] = None,
+                 access_flush_size: int = 64, sweep_interval: float = 60.0):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.access_flush_size = access_flush_size
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL, "
+            "created_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if "created_at" not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        self._conn.commit()
+        self._count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self._accessed = {}
+        self._last_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.ttl is not None and row[1] < now - self.ttl:
+                self._count -= self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= self.access_flush_size:
+                self._flush_access_times()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def _flush_access_times(self):
+        if self._accessed:
+            self._conn.executemany(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()]
+            )
+            self._accessed.clear()
+
+    def set_many(self, items: Dict[str, bytes]):
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            keys = list(items)
+            existing = 0
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM {self.table} WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchone()[0]
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_access, created_at) VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()]
+            )
+            self._count += len(items) - existing
+            for key in items:
+                self._accessed.pop(key, None)
+            self._evict()
+            self._conn.commit()
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+    def _evict(self):
+        """Drop expired rows, then the least recently used rows beyond max_entries"""
+        now = time.time()
+        if self.ttl is not None and now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self._count -= self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,)
+            ).rowcount
+        if self._count > self.max_entries:
+            # Eviction order depends on recent hits, so write them first
+            self._flush_access_times()
+            self._count -= self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (self._count - self.max_entries,)
+            ).rowcount
+
+    def flush(self):
+        """Write buffered access times"""
+        with self._lock:
+            self._flush_access_times()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._count -= self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -1,3 +1,4 @@
+import json
 from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, DateTime, func
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 from sqlalchemy import create_engine
@@ -43,6 +44,26 @@ class Score(Base):
     created_at = Column(DateTime, default=func.now())
     resume = relationship("Resume", back_populates="scores")
 
+# Insights of an analysis saved before its RAG sections finished streaming
+EMPTY_INSIGHTS = "{}"
+
+class AnalysisInsight(Base):
+    __tablename__ = "analysis_insights"
+    id = Column(Integer, primary_key=True)
+    score_id = Column(Integer, ForeignKey("scores.id"))
+    analysis_key = Column(String, index=True)   # Hash of the resume file and job description
+    insights = Column(Text)                     # JSON object of RAG section name -> text
+    created_at = Column(DateTime, default=func.now())
+
+class StageResult(Base):
+    __tablename__ = "stage_results"
+    id = Column(Integer, primary_key=True)
+    stage = Column(String)
+    input_hash = Column(String, index=True)     # sha256 of the stage, prompt version and normalized input text
+    prompt_version = Column(String)
+    output = Column(Text)                       # JSON output of the stage
+    created_at = Column(DateTime, default=func.now())
+
 def get_user_resumes(user_id):
     session = SessionLocal()
     resumes = session.query(Resume).filter_by(user_id=user_id).all()
@@ -58,6 +79,34 @@ def get_scores_for_resume(resume_id):
     scores = session.query(Score).filter_by(resume_id=resume_id).all()
     return scores
 
+def get_analysis_insights(analysis_key):
+    """Most recently stored RAG insights for a resume/JD pair, or an empty dict"""
+    session = SessionLocal()
+    try:
+        row = (
+            session.query(AnalysisInsight)
+            .filter(AnalysisInsight.analysis_key == analysis_key, AnalysisInsight.insights != EMPTY_INSIGHTS)
+            .order_by(AnalysisInsight.id.desc())
+            .first()
+        )
+        return json.loads(row.insights) if row is not None else {}
+    finally:
+        session.close()
+
+def get_stage_result(stage, input_hash):
+    """Stored output of an extraction stage for this input hash, or None"""
+    session = SessionLocal()
+    try:
+        row = (
+            session.query(StageResult)
+            .filter_by(stage=stage, input_hash=input_hash)
+            .order_by(StageResult.id.desc())
+            .first()
+        )
+        return json.loads(row.output) if row is not None else None
+    finally:
+        session.close()
+
 # Setup engine
 #engine = create_engine("sqlite:///resume_analyzer.db")
 
@@ -0,0 +1,70 @@
+import os
+import hashlib
+
+from array import array
+from typing import Dict, List
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from cache import LRUCache, DiskCache
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Content-addressed two-tier cache in front of an embedding function"""
+
+    def __init__(self, embedding_function, model_name: str, cache_path: str = EMBEDDING_CACHE_PATH,
+                 memory_entries: int = 4096, disk_entries: int = 200000):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.memory = LRUCache(max_entries=memory_entries)
+        self.disk = DiskCache(cache_path, table="embeddings", max_entries=disk_entries)
+        self.api_calls = 0
+        self.api_texts = 0
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [self._key(text) for text in input]
+        vectors = {}
+        missing = {}
+
+        for key, text in zip(keys, input):
+            if key in vectors or key in missing:
+                continue
+            vector = self.memory.get(key)
+            if vector is None:
+                blob = self.disk.get(key)
+                if blob is not None:
+                    vector = array("f", blob).tolist()
+                    self.memory.set(key, vector)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+
+        # Only texts seen in neither tier leave the process, as a single request
+        if missing:
+            embedded = self.embedding_function(list(missing.values()))
+            self.api_calls += 1
+            self.api_texts += len(missing)
+            new_rows = {}
+            for key, vector in zip(missing, embedded):
+                vector = [float(value) for value in vector]
+                vectors[key] = vector
+                self.memory.set(key, vector)
+                new_rows[key] = array("f", vector).tobytes()
+            self.disk.set_many(new_rows)
+
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for both tiers and the number of upstream requests"""
+        return {
+            "memory_hits": self.memory.hits,
+            "memory_misses": self.memory.misses,
+            "disk_hits": self.disk.hits,
+            "disk_misses": self.disk.misses,
+            "api_calls": self.api_calls,
+            "api_texts": self.api_texts
+        }
@@ -0,0 +1,133 @@
+import io
+import os
+import hashlib
+import threading
+import multiprocessing
+import PyPDF2 as pdf
+
+from typing import Any, List
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cache import LRUCache, DiskCache
+
+# Next to this module, so the cache doesn't depend on the working directory
+EXTRACT_CACHE_PATH = os.getenv("EXTRACT_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "extract_cache.db"))
+# Caps for pathological uploads: larger files are rejected, pages past the limit are ignored
+MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", 20 * 1024 * 1024))
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", 50))
+# PDFs with at least this many pages are split across worker processes
+PARALLEL_MIN_PAGES = int(os.getenv("EXTRACT_PARALLEL_MIN_PAGES", 12))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+
+MIME_KINDS = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/plain": "txt",
+}
+
+_memory = LRUCache(max_entries=256)
+_disk = DiskCache(EXTRACT_CACHE_PATH, table="extracted_text", max_entries=10000)
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Shared worker pool, created on first use; spawned so workers don't inherit app threads"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _read_bytes(source: Any) -> bytes:
+    """Bytes of an uploaded file, file object, path or raw bytes, without moving the file position"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    position = source.tell()
+    data = source.read()
+    source.seek(position)
+    return data
+
+def detect_kind(source: Any, kind: str = None) -> str:
+    if kind:
+        return MIME_KINDS.get(kind, kind)
+    mime = getattr(source, "type", None)
+    if mime in MIME_KINDS:
+        return MIME_KINDS[mime]
+    name = source if isinstance(source, str) else getattr(source, "name", "") or ""
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension in ("pdf", "docx", "txt"):
+        return extension
+    raise ValueError("Unsupported file type. Please upload a PDF, DOCX or TXT file.")
+
+def _extract_pages(data: bytes, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in worker processes, so it re-opens the PDF from bytes"""
+    reader = pdf.PdfReader(io.BytesIO(data))
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def extract_pdf(data: bytes, max_pages: int = MAX_PAGES, workers: int = EXTRACT_WORKERS) -> str:
+    page_count = min(len(pdf.PdfReader(io.BytesIO(data)).pages), max_pages)
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        pages = _extract_pages(data, 0, page_count)
+    else:
+        step = -(-page_count // workers)
+        try:
+            futures = [
+                _get_pool().submit(_extract_pages, data, start, min(start + step, page_count))
+                for start in range(0, page_count, step)
+            ]
+            pages = [page for future in futures for page in future.result()]
+        except BrokenProcessPool as e:
+            print(f"Extraction worker pool failed, extracting serially: {e}")
+            _reset_pool()
+            pages = _extract_pages(data, 0, page_count)
+    return "\n".join(pages)
+
+def extract_docx(data: bytes) -> str:
+    import mammoth
+    return mammoth.extract_raw_text(io.BytesIO(data)).value
+
+def extract_txt(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+def extract_text(source: Any, kind: str = None, max_pages: int = MAX_PAGES, max_bytes: int = MAX_BYTES) -> str:
+    """
+    Text of a PDF, DOCX or TXT upload
+    Results are cached by a hash of the file bytes, so re-uploads and reruns skip extraction
+    """
+    kind = detect_kind(source, kind)
+    data = _read_bytes(source)
+    if len(data) > max_bytes:
+        raise ValueError(f"File is too large ({len(data) / 2**20:.1f} MB, limit {max_bytes / 2**20:.0f} MB).")
+
+    key = f"{kind}:{max_pages}:{hashlib.sha256(data).hexdigest()}"
+    text = _memory.get(key)
+    if text is not None:
+        return text
+    cached = _disk.get(key)
+    if cached is not None:
+        text = cached.decode("utf-8")
+        _memory.set(key, text)
+        return text
+
+    if kind == "pdf":
+        text = extract_pdf(data, max_pages)
+    elif kind == "docx":
+        text = extract_docx(data)
+    else:
+        text = extract_txt(data)
+
+    _memory.set(key, text)
+    _disk.set(key, text.encode("utf-8"))
+    return text
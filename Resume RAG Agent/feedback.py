@@ -1,21 +1,42 @@
 import json
+import time
+import hashlib
 import requests
 import streamlit as st
 from datetime import datetime
 from typing import Dict, Any
-from rag import RAGKnowledgeBase
-from db import SessionLocal, User, Resume, JobDescription, Score, get_user_resumes, get_user_job_descriptions, get_scores_for_resume
+from rag import RAGKnowledgeBase, RAG_SECTIONS, SECTION_UNAVAILABLE
+from analysis_context import AnalysisContext
+from prompt import PromptBuilder, compact_json
+from lexical import flatten_skills
+from json_stream import parse_agent_json
+from persistence import write_behind
+from db import SessionLocal, User, Resume, JobDescription, Score, AnalysisInsight, EMPTY_INSIGHTS, get_user_resumes, get_user_job_descriptions, get_scores_for_resume
+
+# Token budget for the improvement prompt
+IMPROVEMENT_PROMPT_BUDGET = 4000
 
 def improve_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], score_data: Dict[str, Any], improvement_agent, coordinator, knowledge_base: RAGKnowledgeBase) -> Dict[str, Any]:
     """Provide suggestions to improve the resume based on the job description and score."""
-    prompt = f"Suggest improvements for the resume data: {resume_data} based on job description: {job_data} and score: {score_data}"
+    # Skill gaps resolved locally against the skill taxonomy graph
+    skill_gaps = knowledge_base.skill_graph.match(resume_data.get("Skills", []), job_data.get("skills", []))
+    
+    prompt = (
+        PromptBuilder(IMPROVEMENT_PROMPT_BUDGET, name="improve_resume")
+        .add("task", "Suggest improvements for the resume based on the job description and score.")
+        .add("skill_gaps", compact_json(skill_gaps), heading="SKILL GAPS (matched, adjacent, missing)")
+        .add("resume_data", compact_json(resume_data), heading="RESUME DATA", priority=2)
+        .add("job_data", compact_json(job_data), heading="JOB DESCRIPTION", priority=1)
+        .add("score_data", compact_json(score_data), heading="SCORE", priority=0)
+        .build()
+    )
     response = coordinator.initiate_chat(
         improvement_agent,
         message=prompt,
         max_turns=1
     )
     response_text = response.chat_history[-1]['content']
-    json_data = json.loads(response_text)
+    json_data = parse_agent_json(response_text, "improvement")
     #st.json(json_data)
     st.success("✅ Successfully improved resume")
     return json_data
@@ -23,20 +44,12 @@ def improve_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], score_
 def store_user_feedback(knowledge_base: RAGKnowledgeBase, resume_data: Dict, score_data: Dict, user_feedback: str):
     """Store user feedback to improve the knowledge base"""
     try:
-        feedback_data = {
-            "id": f"feedback_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "score": score_data.get("score", 0),
-            "feedback": user_feedback,
-            "resume_skills": resume_data.get("Skills", []),
+        # Buffered: embedded and upserted with other feedback in the next batch
+        knowledge_base.feedback_queue.submit(user_feedback, {
+            "score": score_data.get("overall_score", score_data.get("score", 0)),
+            "resume_skills": flatten_skills(resume_data.get("Skills", [])),
             "timestamp": datetime.now().isoformat()
-        }
-        
-        # Add to patterns collection for future learning
-        knowledge_base.patterns_collection.add(
-            documents=[f"User feedback: {user_feedback}"],
-            metadatas=[feedback_data],
-            ids=[feedback_data["id"]]
-        )
+        })
         st.success("Thank you for your feedback! It will help improve future recommendations.")
     except Exception as e:
         st.error(f"Error storing feedback: {e}")
@@ -62,38 +75,73 @@ def display_section(title, data):
         st.markdown(str(data))
 
 #Save the resume, job description and score to the database
-
-def save_resume(user_id, uploaded_file, resume_text, resume_data):
-    session = SessionLocal()
+def write_analysis(session, unit):
+    """Write-behind handler: resume, JD, score and RAG insight rows of one analysis, without committing"""
     resume = Resume(
-        user_id=user_id,
-        file_name=uploaded_file.name,
-        raw_text=resume_text,
-        extracted_json=json.dumps(resume_data)
+        user_id=unit["user_id"],
+        file_name=unit["file_name"],
+        raw_text=unit["resume_text"],
+        extracted_json=json.dumps(unit["resume_data"])
     )
-    session.add(resume)
-    session.commit()
-    return resume.id
-
-def save_job_description(user_id, jd_title, jd_text):
-    session = SessionLocal()
-    jd = JobDescription(user_id=user_id, title=jd_title, description=jd_text)
-    session.add(jd)
-    session.commit()
-    return jd.id
-
-def save_score(resume_id, job_id, score_data):
-    session = SessionLocal()
+    jd = JobDescription(user_id=unit["user_id"], title=unit["jd_title"], description=unit["jd_text"])
+    session.add_all([resume, jd])
+    session.flush()
+
+    # One score row per analysis; the RAG insights hang off it
+    score_data = unit["score_data"]
     score = Score(
-        resume_id=resume_id,
-        job_id=job_id,
+        resume_id=resume.id,
+        job_id=jd.id,
         score=score_data["overall_score"],
         feedback=json.dumps(score_data.get("feedback", {})),
         recommendations=json.dumps(score_data.get("recommendations", {}))
     )
     session.add(score)
-    session.commit()
-    return score.id
+    session.flush()
+    # Raw section texts, so a later run on the same resume and JD can skip generation; an analysis
+    # saved before its insights finished streaming gets an empty row that write_insights fills in
+    session.add(AnalysisInsight(
+        score_id=score.id,
+        analysis_key=unit.get("analysis_key"),
+        insights=json.dumps(unit.get("rag_insights") or {})
+    ))
+
+def write_insights(session, unit):
+    """Write-behind handler: fill the empty insights row of the latest analysis with this key"""
+    row = (
+        session.query(AnalysisInsight)
+        .filter_by(analysis_key=unit["analysis_key"], insights=EMPTY_INSIGHTS)
+        .order_by(AnalysisInsight.id.desc())
+        .first()
+    )
+    if row is None:
+        # The analysis itself was dead-lettered; keep the insights for reruns anyway
+        row = AnalysisInsight(analysis_key=unit["analysis_key"])
+        session.add(row)
+    row.insights = json.dumps(unit["rag_insights"])
+
+write_behind.register("analysis", write_analysis)
+write_behind.register("insights", write_insights)
+
+def persist_analysis(user_id, file_name, resume_text, resume_data, jd_title, jd_text, score_data,
+                     rag_insights=None, analysis_key=None):
+    """Queue every row of an analysis for one background transaction"""
+    write_behind.submit(
+        "analysis",
+        user_id=user_id,
+        file_name=file_name,
+        resume_text=resume_text,
+        resume_data=resume_data,
+        jd_title=jd_title,
+        jd_text=jd_text,
+        score_data=score_data,
+        rag_insights=rag_insights,
+        analysis_key=analysis_key
+    )
+
+def persist_insights(analysis_key, rag_insights):
+    """Queue the streamed RAG insights of an analysis already passed to persist_analysis"""
+    write_behind.submit("insights", analysis_key=analysis_key, rag_insights=rag_insights)
 
 
 def search_jobs_with_serper(query: str):
@@ -181,31 +229,57 @@ def determine_top_skill(resume_data, coordinator, resume_agent):
     )
     return response.chat_history[-1]['content'].strip()
 
-def display_rag_insights(knowledge_base: RAGKnowledgeBase, resume_data: Dict, job_description: str):
-    """Display comprehensive RAG insights."""
+def analysis_key(resume_bytes: bytes, job_description: str) -> str:
+    """Identifies a resume/JD pair; stored insights are reused only while both are unchanged"""
+    digest = hashlib.sha256(resume_bytes)
+    digest.update(b"\0")
+    digest.update(job_description.encode("utf-8"))
+    return digest.hexdigest()
+
+def display_rag_insights(knowledge_base: RAGKnowledgeBase, resume_data: Dict, job_description: str,
+                         context: AnalysisContext = None, stored: Dict[str, str] = None,
+                         resume_text: str = None, prefetched: Dict[str, Dict] = None) -> Dict[str, str]:
+    """Display comprehensive RAG insights, streaming each section into its expander as it is generated.
+    Sections already generated during the analysis (`context`) or previously stored (`stored`)
+    are rendered as-is, so a rerun with complete insights makes no model calls."""
+    
+    context = context if context is not None else AnalysisContext()
+    for name, text in (stored or {}).items():
+        if text and text != SECTION_UNAVAILABLE:
+            context.store(name, text)
     
     st.header("AI Knowledge Base Insights")
     
     resume_skills = resume_data.get("Skills", [])
-    resume_text = str(resume_data)
-    
-    # Get all RAG insights
-    with st.spinner("Generating intelligent insights..."):
-        rag_results = knowledge_base.run_complete_rag_analysis(
-            resume_text, job_description, 
-            st.session_state.score_data.get("score", 50), 
-            resume_skills
-        )
+    resume_text = resume_text or str(resume_data)
     
-    # Display in expandable sections
-    with st.expander("🏭 Industry Intelligence", expanded=True):
-        st.write(rag_results['industry_insights'])
-    
-    with st.expander("⚡ Optimization Recommendations"):
-        st.write(rag_results['optimization_recommendations'])
+    # Expandable sections, filled progressively as tokens arrive
+    expanders = {
+        "industry_insights": st.expander("🏭 Industry Intelligence", expanded=True),
+        "optimization_recommendations": st.expander("⚡ Optimization Recommendations"),
+        "skill_matching": st.expander("🎯 Advanced Skill Analysis"),
+        #"scoring_insights": st.expander("📊 Historical Performance Insights"),
+    }
+    placeholders = {name: expander.empty() for name, expander in expanders.items()}
+    for placeholder in placeholders.values():
+        placeholder.caption("Generating intelligent insights...")
     
-    with st.expander("🎯 Advanced Skill Analysis"):
-        st.write(rag_results['skill_matching'])
+    # Keep the assembled text of every section (including hidden ones) for caching and storage
+    buffers = {name: [] for name in RAG_SECTIONS}
+    last_render = {name: 0.0 for name in RAG_SECTIONS}
+    for name, token in knowledge_base.stream_complete_rag_analysis(
+        resume_text, job_description,
+        st.session_state.score_data.get("overall_score", 50),
+        resume_skills,
+        prefetched=prefetched,
+        context=context
+    ):
+        if token:
+            buffers[name].append(token)
+        # Throttle re-renders; always render the final text of a section
+        now = time.monotonic()
+        if name in placeholders and (token is None or now - last_render[name] > 0.1):
+            placeholders[name].write("".join(buffers[name]) or SECTION_UNAVAILABLE)
+            last_render[name] = now
     
-    #with st.expander("📊 Historical Performance Insights"):
-        #st.write(rag_results['scoring_insights'])
+    return {name: "".join(parts).strip() or SECTION_UNAVAILABLE for name, parts in buffers.items()}
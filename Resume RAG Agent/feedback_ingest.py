@@ -0,0 +1,234 @@
+import time
+import uuid
+import queue
+import atexit
+import hashlib
+import weakref
+import threading
+
+from collections import deque
+from typing import Any, Dict, List
+
+from lexical import tokenize
+
+def shingles(text: str, size: int = 3) -> frozenset:
+    """Word n-grams of normalized text; short texts fall back to their tokens"""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return frozenset(tokens)
+    return frozenset(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+# Queues with a registered shutdown, closed by one atexit hook; a queue drops out once its knowledge base is gone
+_shutdown_queues = weakref.WeakSet()
+
+def _close_all():
+    for ingest_queue in list(_shutdown_queues):
+        ingest_queue.close()
+
+atexit.register(_close_all)
+
+
+class FeedbackIngestQueue:
+    """
+    Buffers user feedback and writes it to the patterns collection in batches
+    Near-duplicates of accepted or in-flight feedback are dropped on submit, ids are uuid-based, and a
+    background thread embeds and upserts a batch once `batch_size` items are waiting or
+    `flush_interval` seconds have passed since the first one arrived. Feedback only enters the dedup
+    window once it has been upserted; a failed batch is requeued up to `max_attempts` times.
+    The knowledge base is held weakly and the worker exits after `idle_timeout` seconds without
+    work, so a queue doesn't keep its session's knowledge base alive.
+    """
+
+    def __init__(self, knowledge_base, batch_size: int = 32, flush_interval: float = 2.0,
+                 max_pending: int = 1000, similarity_threshold: float = 0.85, dedup_window: int = 500,
+                 max_attempts: int = 3, idle_timeout: float = 30.0):
+        self._knowledge_base = weakref.ref(knowledge_base)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.similarity_threshold = similarity_threshold
+        self.max_attempts = max_attempts
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._recent = deque(maxlen=dedup_window)
+        self._recent_hashes = {}
+        self._in_flight = {}
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ingest_times = deque(maxlen=1000)
+        self.metrics = {"submitted": 0, "duplicates": 0, "ingested": 0, "batches": 0, "failed": 0,
+                        "requeued": 0, "dropped": 0}
+
+    @property
+    def knowledge_base(self):
+        knowledge_base = self._knowledge_base()
+        if knowledge_base is None:
+            raise RuntimeError("Knowledge base for this feedback queue no longer exists")
+        return knowledge_base
+
+    def _claim(self, record_id: str, text: str) -> bool:
+        """Reserve new feedback as in flight, returns False when it duplicates accepted or in-flight feedback"""
+        digest = hashlib.sha256(" ".join(tokenize(text)).encode()).hexdigest()
+        features = shingles(text)
+        with self._lock:
+            seen = list(self._recent) + list(self._in_flight.values())
+            if digest in self._recent_hashes or any(
+                other_digest == digest or jaccard(features, other) >= self.similarity_threshold
+                for other_digest, other in seen
+            ):
+                return False
+            self._in_flight[record_id] = (digest, features)
+            return True
+
+    def _accept(self, record_ids: List[str]):
+        """Move upserted feedback from in flight into the dedup window"""
+        with self._lock:
+            for record_id in record_ids:
+                entry = self._in_flight.pop(record_id, None)
+                self._attempts.pop(record_id, None)
+                if entry is None:
+                    continue
+                if len(self._recent) == self._recent.maxlen:
+                    self._recent_hashes.pop(self._recent[0][0], None)
+                self._recent.append(entry)
+                self._recent_hashes[entry[0]] = True
+
+    def _release(self, record_id: str):
+        """Forget feedback that was given up on, so it can be submitted again"""
+        with self._lock:
+            self._in_flight.pop(record_id, None)
+            self._attempts.pop(record_id, None)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="feedback-ingest", daemon=True)
+                self._thread.start()
+
+    def submit(self, feedback: str, metadata: Dict[str, Any]) -> str:
+        """Queue feedback for ingestion, returns its id or None when it was dropped as a duplicate"""
+        self.metrics["submitted"] += 1
+        record_id = f"feedback_{uuid.uuid4().hex}"
+        if not self._claim(record_id, feedback):
+            self.metrics["duplicates"] += 1
+            return None
+        record = (
+            record_id,
+            f"User feedback: {feedback}",
+            self.knowledge_base._process_metadata({**metadata, "feedback": feedback, "id": record_id})
+        )
+        try:
+            self._queue.put(record, timeout=self.flush_interval)
+        except queue.Full:
+            # Queue saturated: ingest on the caller rather than growing without bound
+            self._ingest([record])
+            return record_id
+        # Started after the put: a worker exiting idle checks the queue under the start lock, so either it
+        # sees this record and stays, or it has already cleared itself and a new one starts here
+        self._ensure_started()
+        return record_id
+
+    def _run(self):
+        idle_since = time.monotonic()
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if time.monotonic() - idle_since >= self.idle_timeout:
+                    # Exit when idle; the next submit starts a new worker
+                    with self._start_lock:
+                        if self._queue.empty():
+                            self._thread = None
+                            return
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._ingest(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            idle_since = time.monotonic()
+
+    def _ingest(self, batch: List[tuple]):
+        """One embedding call and one upsert for the whole batch"""
+        ids, documents, metadatas = (list(column) for column in zip(*batch))
+        try:
+            collection = self.knowledge_base.patterns_collection
+            embeddings = self.knowledge_base.embedding_function(documents)
+            collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+            for record_id, document, metadata in batch:
+                self.knowledge_base.pattern_index.add_record(record_id, document, metadata)
+        except Exception as e:
+            self.metrics["failed"] += len(batch)
+            print(f"Error ingesting feedback batch of {len(batch)}: {e}")
+            self._requeue(batch)
+            return
+        self._accept(ids)
+        with self._lock:
+            self.metrics["ingested"] += len(batch)
+            self.metrics["batches"] += 1
+            now = time.monotonic()
+            self._ingest_times.extend([now] * len(batch))
+
+    def _requeue(self, batch: List[tuple]):
+        """Put a failed batch back for another attempt, giving up on records past max_attempts"""
+        for record in batch:
+            with self._lock:
+                attempts = self._attempts[record[0]] = self._attempts.get(record[0], 0) + 1
+            if attempts >= self.max_attempts:
+                self.metrics["dropped"] += 1
+                print(f"Giving up on feedback {record[0]} after {attempts} attempts")
+                self._release(record[0])
+                continue
+            try:
+                self._queue.put_nowait(record)
+                self.metrics["requeued"] += 1
+            except queue.Full:
+                self.metrics["dropped"] += 1
+                self._release(record[0])
+        # Back off before the retried records come round again
+        time.sleep(min(0.5 * attempts, 2.0))
+
+    def stats(self, window: float = 60.0) -> Dict[str, float]:
+        """Counters, current queue depth and ingest rate over the last `window` seconds"""
+        now = time.monotonic()
+        with self._lock:
+            metrics = dict(self.metrics)
+            recent = sum(1 for moment in self._ingest_times if now - moment <= window)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["ingest_per_second"] = round(recent / window, 3)
+        metrics["avg_batch_size"] = round(metrics["ingested"] / metrics["batches"], 1) if metrics["batches"] else 0.0
+        return metrics
+
+    def flush(self):
+        """Block until every queued feedback item has been ingested"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+
+    def register_shutdown(self) -> "FeedbackIngestQueue":
+        """Flush at interpreter exit; doesn't keep the queue (or its knowledge base) alive"""
+        _shutdown_queues.add(self)
+        return self
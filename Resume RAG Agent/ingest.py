@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+import time
+import hashlib
+import argparse
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Iterator, Iterable, List, Dict, Any
+
+from rag import RECORD_BUILDERS
+
+# Fields stored as lists in JSONL that are written as "|"-separated cells in CSV
+CSV_LIST_FIELDS = {"key_skills", "related_skills", "industry_relevance", "proficiency_indicators"}
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily read records from a JSONL or CSV file."""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    elif path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {
+                    key: value.split("|") if key in CSV_LIST_FIELDS else value
+                    for key, value in row.items()
+                }
+    else:
+        raise ValueError(f"Unsupported record file: {path}")
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of at most `size` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class BulkLoader:
+    """Streaming, batched and resumable loader for a knowledge base collection"""
+
+    def __init__(self, knowledge_base, collection_name: str, batch_size: int = 256,
+                 max_workers: int = 4, checkpoint_path: str = None):
+        self.knowledge_base = knowledge_base
+        self.collection = knowledge_base.collections[collection_name]
+        self.build = RECORD_BUILDERS[collection_name]
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path
+
+    def _read_checkpoint(self, path: str) -> int:
+        """Number of records already committed from `path` in a previous run"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        return checkpoint.get("committed", 0) if checkpoint.get("source") == path else 0
+
+    def _write_checkpoint(self, path: str, committed: int):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": path, "committed": committed}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _prepare(self, items: List[Dict[str, Any]]) -> tuple:
+        """Build ids, documents and flattened metadata for a batch of raw records"""
+        ids, documents, metadatas = [], [], []
+        for item in items:
+            if "id" not in item:
+                item = {**item, "id": hashlib.sha256(json.dumps(item, sort_keys=True).encode()).hexdigest()[:16]}
+            record_id, document, metadata = self.build(item)
+            ids.append(record_id)
+            documents.append(document)
+            metadatas.append(self.knowledge_base._process_metadata(metadata))
+        return ids, documents, metadatas
+
+    def _embed(self, batch: List[Dict[str, Any]]) -> tuple:
+        ids, documents, metadatas = self._prepare(batch)
+        embeddings = self.knowledge_base.embedding_function(documents)
+        return ids, documents, metadatas, embeddings
+
+    def load(self, path: str) -> Dict[str, float]:
+        """Embed and upsert every record in `path`, resuming from the last checkpoint."""
+        skipped = self._read_checkpoint(path)
+        records = islice(iter_records(path), skipped, None)
+
+        start = time.perf_counter()
+        loaded = 0
+        committed = skipped
+        next_batch = 0
+        done = {}
+        pending = {}
+
+        # Embeddings run concurrently, writes happen on this thread in batch order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batches = enumerate(batched(records, self.batch_size))
+            exhausted = False
+            while not exhausted or pending:
+                while not exhausted and len(pending) < self.max_workers * 2:
+                    try:
+                        index, batch = next(batches)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(self._embed, batch)] = index
+
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[pending.pop(future)] = future.result()
+
+                # Commit only the contiguous prefix so the checkpoint never skips a batch
+                while next_batch in done:
+                    ids, documents, metadatas, embeddings = done.pop(next_batch)
+                    self.collection.upsert(
+                        ids=ids,
+                        embeddings=embeddings,
+                        documents=documents,
+                        metadatas=metadatas
+                    )
+                    loaded += len(ids)
+                    committed += len(ids)
+                    next_batch += 1
+                    self._write_checkpoint(path, committed)
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "loaded": loaded,
+            "skipped": skipped,
+            "seconds": round(elapsed, 3),
+            "docs_per_sec": round(loaded / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        print(f"Loaded {loaded} records into {self.collection.name} ({stats['docs_per_sec']} docs/sec)")
+        return stats
+
+
+if __name__ == "__main__":
+    from rag import RAGKnowledgeBase
+
+    parser = argparse.ArgumentParser(description="Bulk load records into a knowledge base collection")
+    parser.add_argument("collection", choices=sorted(RECORD_BUILDERS))
+    parser.add_argument("path", help="JSONL or CSV file of records")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file for resumable loads")
+    args = parser.parse_args()
+
+    knowledge_base = RAGKnowledgeBase()
+    print(knowledge_base.bulk_load(
+        args.collection, args.path,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        checkpoint_path=args.checkpoint
+    ))
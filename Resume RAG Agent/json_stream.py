@@ -0,0 +1,270 @@
+import re
+import json
+
+from typing import Any, Dict, List, Tuple
+
+# Per-agent schemas: field -> (accepted types, default used when the field is missing)
+SCHEMAS = {
+    "resume": {
+        "Name": ((str,), ""),
+        "Skills": ((list, dict), []),
+        "Experience": ((list, dict, str), []),
+        "Education": ((list, dict, str), []),
+        "Formatting Issues": ((list,), []),
+    },
+    "job": {
+        "skills": ((list, dict), []),
+        "qualifications": ((list, dict, str), []),
+        "requirements": ((list, dict, str), []),
+    },
+    "score": {
+        "overall_score": ((int,), 0),
+        "keyword_match": ((int,), 0),
+        "skills_match": ((int,), 0),
+        "experience_match": ((int,), 0),
+        "education_match": ((int,), 0),
+        "recommendations": ((list,), []),
+    },
+    "improvement": {
+        "missing_keywords": ((list,), []),
+        "format_improvements": ((list,), []),
+        "skill_gaps": ((list,), []),
+        "ATS_optimizations": ((list,), []),
+        "actionable_steps": ((list,), []),
+    },
+}
+
+CLOSERS = {"{": "}", "[": "]"}
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+LITERAL_PATTERN = re.compile(r"True|False|None")
+KEY_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"\s*:')
+
+def repair_json(text: str) -> str:
+    """Local fixes for common model output damage: fences, trailing commas, Python literals, truncation"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text)
+
+    output, stack, in_string, escape = [], [], False, False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            # Drop a trailing comma before the closer
+            while output and output[-1].isspace():
+                output.pop()
+            if output and output[-1] == ",":
+                output.pop()
+            if stack:
+                stack.pop()
+        else:
+            literal = LITERAL_PATTERN.match(text, index)
+            if literal and not (output and (output[-1].isalnum() or output[-1] == "_")):
+                output.append(PYTHON_LITERALS[literal.group()])
+                index = literal.end()
+                continue
+        output.append(char)
+        index += 1
+
+    # Close whatever is still open at the end of a truncated reply
+    if in_string:
+        output.append('"')
+    text = re.sub(r"[,:]\s*$", "", "".join(output))
+    return text + "".join(reversed(stack))
+
+def coerce(value: Any, types: tuple) -> Any:
+    """Convert a value to the first accepted type when it has none of them"""
+    if isinstance(value, types) and not (isinstance(value, bool) and bool not in types):
+        return value
+    target = types[0]
+    try:
+        if target is int:
+            return int(round(float(str(value).strip().rstrip("%"))))
+        if target is list:
+            return [value] if value not in (None, "") else []
+        if target is str:
+            return "" if value is None else str(value)
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"expected {target.__name__}, got {type(value).__name__}")
+
+
+def split_members(member: str) -> List[str]:
+    """Top-level `"key": value` pieces of object text whose separating commas are missing"""
+    pieces, start, depth = [], 0, 0
+    in_string = escape = seen_colon = seen_value = False
+    for index, char in enumerate(member):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            if depth == 0 and seen_value and KEY_PATTERN.match(member, index):
+                pieces.append(member[start:index])
+                start, seen_colon, seen_value = index, False, False
+            in_string = True
+        elif char == ":" and depth == 0:
+            seen_colon = True
+            continue
+        elif char in CLOSERS:
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+        if seen_colon and not char.isspace():
+            seen_value = True
+    pieces.append(member[start:])
+    return [piece.strip().rstrip(",") for piece in pieces if piece.strip()]
+
+
+class StreamingJSONParser:
+    """
+    Incremental, tolerant parser for a JSON object arriving in chunks
+    Text before the first "{" (prose, markdown fences) is skipped. Each top-level field is parsed and
+    validated against the schema as soon as its value completes, so `partial` fills up while the rest
+    of the reply is still arriving; every character is scanned once. Fields that fail to parse are
+    repaired locally, and `finish` closes a truncated object and fills schema defaults. A reply
+    without any object gives the defaults, with every schema field listed in `missing`.
+    """
+
+    def __init__(self, schema: Dict[str, tuple] = None):
+        self.schema = schema or {}
+        self.partial = {}
+        self.errors = []
+        # Text of the member being read, as received: the reply itself is never re-joined
+        self._member = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self.found = False
+        self.complete = False
+        self.truncated = False
+        # Schema fields the reply didn't supply, filled with defaults by finish()
+        self.missing = []
+
+    def _take(self, tail: str) -> str:
+        self._member.append(tail)
+        member = "".join(self._member)
+        self._member = []
+        return member
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Consume the next chunk, returning every field completed so far"""
+        if self.complete or not chunk:
+            return self.partial
+        segment = 0
+        for index, char in enumerate(chunk):
+            if not self.found:
+                if char == "{":
+                    self._stack.append("}")
+                    self.found = True
+                    segment = index + 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in CLOSERS:
+                self._stack.append(CLOSERS[char])
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._complete_member(self._take(chunk[segment:index]))
+                    self.complete = True
+                    return self.partial
+            elif char == "," and len(self._stack) == 1:
+                self._complete_member(self._take(chunk[segment:index]))
+                segment = index + 1
+        if self.found:
+            self._member.append(chunk[segment:])
+        return self.partial
+
+    def _complete_member(self, member: str):
+        member = member.strip()
+        if not member:
+            return
+        fields = self._parse_member(member)
+        if fields is None:
+            # Usually a missing comma merged neighbouring fields: parse them one by one
+            pieces = split_members(member)
+            parsed = [self._parse_member(piece) for piece in pieces] if len(pieces) > 1 else [None]
+            if any(fields is not None for fields in parsed):
+                self.errors.append(f"missing separator in {member[:40]!r}, split locally")
+            else:
+                self.errors.append(f"unparseable field {member[:40]!r}")
+            fields = {name: value for piece in parsed if piece for name, value in piece.items()}
+        for name, value in fields.items():
+            self._accept(name, value)
+
+    @staticmethod
+    def _parse_member(member: str):
+        try:
+            return json.loads("{" + member + "}")
+        except ValueError:
+            try:
+                return json.loads(repair_json("{" + member + "}"))
+            except ValueError:
+                return None
+
+    def _accept(self, name: str, value: Any):
+        if name in self.schema:
+            try:
+                value = coerce(value, self.schema[name][0])
+            except ValueError as e:
+                self.errors.append(f"{name}: {e}")
+                return
+        self.partial[name] = value
+
+    def finish(self) -> Dict[str, Any]:
+        """Close a truncated object, fill schema defaults and return the result"""
+        if not self.found:
+            self.errors.append("no JSON object found")
+        elif not self.complete:
+            self.truncated = True
+            self.errors.append("output truncated, closed locally")
+            self._complete_member(repair_json(self._take("")))
+        self.complete = True
+        for name, (_, default) in self.schema.items():
+            if name not in self.partial:
+                self.missing.append(name)
+                self.partial[name] = json.loads(json.dumps(default))
+        return self.partial
+
+
+def parse_agent_reply(text: str, schema: str = None) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Tolerantly parse a complete agent reply against one of SCHEMAS, also returning what was incomplete:
+    the schema fields filled with defaults, plus "truncated" when the object had to be closed locally
+    and "no object" when the reply had none. Callers should not cache or store a result whose list is non-empty.
+    """
+    parser = StreamingJSONParser(SCHEMAS.get(schema))
+    parser.feed(text)
+    result = parser.finish()
+    incomplete = parser.missing + (["truncated"] if parser.truncated else []) + ([] if parser.found else ["no object"])
+    if parser.errors or parser.missing:
+        print(f"Repaired {schema or 'agent'} output: {'; '.join(parser.errors + [f'missing {name}' for name in parser.missing])}")
+    return result, incomplete
+
+def parse_agent_json(text: str, schema: str = None) -> Dict[str, Any]:
+    """Tolerantly parse a complete agent reply against one of SCHEMAS"""
+    return parse_agent_reply(text, schema)[0]
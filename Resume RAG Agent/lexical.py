@@ -0,0 +1,110 @@
+import re
+import math
+
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Iterable
+
+# Keeps tokens like c++, c#, node.js and .net intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*|\.[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return [token.rstrip(".") for token in TOKEN_PATTERN.findall(str(text).lower()) if token.rstrip(".")]
+
+def flatten_skills(skills: Any) -> List[str]:
+    """Skills as a flat list of strings, whether extracted as a list, a category dict or a comma string"""
+    if isinstance(skills, str):
+        return [skill.strip() for skill in skills.split(",") if skill.strip()]
+    if isinstance(skills, dict):
+        return [skill for value in skills.values() for skill in flatten_skills(value)]
+    if isinstance(skills, (list, tuple, set)):
+        return [skill for item in skills for skill in flatten_skills(item)]
+    return [str(skills)] if skills is not None else []
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[str]:
+    """Merge several ranked id lists; ids ranked high in any list float to the top"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+
+    def add(self, doc_id: str, text: str):
+        tokens = tokenize(text)
+        self.lengths[doc_id] = len(tokens)
+        for token, frequency in Counter(tokens).items():
+            self.postings[token][doc_id] = frequency
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.postings
+
+    def search(self, tokens: List[str], n_results: int = 5) -> List[tuple]:
+        """(doc_id, score) pairs for the best matches, highest score first"""
+        if not self.lengths:
+            return []
+        total = len(self.lengths)
+        average_length = sum(self.lengths.values()) / total
+        scores = defaultdict(float)
+        for token in set(tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:n_results]
+
+
+class SkillLexicalIndex:
+    """BM25 over skill names, related skills and industry relevance of the skills taxonomy"""
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        self.records = {}
+        self.bm25 = BM25Index()
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            metadata = metadata or {}
+            self.records[doc_id] = (document, metadata)
+            self.bm25.add(doc_id, " ".join(
+                str(metadata.get(field, "")) for field in ("skill", "related_skills", "industry_relevance")
+            ))
+
+    @classmethod
+    def from_collection(cls, collection) -> "SkillLexicalIndex":
+        data = collection.get(include=["documents", "metadatas"])
+        return cls(data["ids"], data["documents"], data["metadatas"])
+
+    def recall(self, skills: List[str]) -> float:
+        """Share of skills whose every token is known to the index"""
+        skills = [tokenize(skill) for skill in skills]
+        skills = [tokens for tokens in skills if tokens]
+        if not skills:
+            return 0.0
+        return sum(all(token in self.bm25 for token in tokens) for tokens in skills) / len(skills)
+
+    def search(self, skills: List[str], n_results: int = 5) -> List[str]:
+        tokens = [token for skill in skills for token in tokenize(skill)]
+        return [doc_id for doc_id, _ in self.bm25.search(tokens, n_results)]
+
+    def as_query_result(self, ids: List[str], fallback: Dict[str, List] = None) -> Dict[str, List]:
+        """Shape ids like a single-query collection.query() response"""
+        known = {}
+        if fallback:
+            for doc_id, document, metadata in zip(fallback["ids"][0], fallback["documents"][0], fallback["metadatas"][0]):
+                known[doc_id] = (document, metadata)
+        known.update(self.records)
+        ids = [doc_id for doc_id in ids if doc_id in known]
+        return {
+            "ids": [ids],
+            "documents": [[known[doc_id][0] for doc_id in ids]],
+            "metadatas": [[known[doc_id][1] for doc_id in ids]]
+        }
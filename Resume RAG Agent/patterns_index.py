@@ -0,0 +1,155 @@
+import re
+import bisect
+import threading
+
+from typing import List, Dict, Any, Optional
+
+RANGE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-|–|to)\s*(\d+(?:\.\d+)?)")
+
+def parse_score_range(metadata: Dict[str, Any]) -> Optional[tuple]:
+    """(low, high) from a "70-84" style score_range, or a point interval from a plain score"""
+    score_range = metadata.get("score_range")
+    if score_range is not None:
+        match = RANGE_PATTERN.search(str(score_range))
+        if match:
+            low, high = float(match.group(1)), float(match.group(2))
+            return min(low, high), max(low, high)
+    score = metadata.get("score")
+    try:
+        return float(score), float(score)
+    except (TypeError, ValueError):
+        return None
+
+
+GENERAL_INDUSTRY = "General"
+
+def pattern_industry(metadata: Dict[str, Any]) -> str:
+    return str((metadata or {}).get("industry") or GENERAL_INDUSTRY).strip() or GENERAL_INDUSTRY
+
+
+class _Intervals:
+    """
+    Intervals sorted by lower bound with a running maximum of upper bounds, so an overlap query
+    scans back from the bisect point and stops once no earlier interval can reach
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.lows = []
+        self._max_highs = []
+        self._dirty = False
+
+    def add(self, entry: Dict[str, Any]):
+        position = bisect.bisect_right(self.lows, entry["low"])
+        self.lows.insert(position, entry["low"])
+        self.entries.insert(position, entry)
+        self._dirty = True
+
+    def overlapping(self, low: float, high: float) -> List[Dict[str, Any]]:
+        if self._dirty:
+            running = float("-inf")
+            self._max_highs = []
+            for entry in self.entries:
+                running = max(running, entry["high"])
+                self._max_highs.append(running)
+            self._dirty = False
+        matches = []
+        position = bisect.bisect_right(self.lows, high) - 1
+        while position >= 0 and self._max_highs[position] >= low:
+            entry = self.entries[position]
+            if entry["high"] >= low:
+                matches.append(entry)
+            position -= 1
+        matches.reverse()
+        return matches
+
+
+class ScoreRangeIndex:
+    """
+    Interval index over historical scoring patterns, keyed by industry and score range
+    Each industry keeps its own sorted interval list; patterns without an industry are filed under
+    "General" and apply to every industry. Queries without an industry search all of them.
+    """
+
+    def __init__(self):
+        self.industries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_collection(cls, collection) -> "ScoreRangeIndex":
+        index = cls()
+        data = collection.get(include=["documents", "metadatas"])
+        for record_id, document, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            index.add_record(record_id, document, metadata)
+        return index
+
+    def add_record(self, record_id: str, document: str, metadata: Dict[str, Any]) -> bool:
+        """Index a pattern record, returns False when it carries no usable score"""
+        bounds = parse_score_range(metadata or {})
+        if bounds is None:
+            return False
+        entry = {
+            "id": record_id,
+            "low": bounds[0],
+            "high": bounds[1],
+            "industry": pattern_industry(metadata),
+            "document": document,
+            "metadata": metadata
+        }
+        with self._lock:
+            self.industries.setdefault(entry["industry"].lower(), _Intervals()).add(entry)
+        return True
+
+    def _groups(self, industry: Optional[str]) -> List[_Intervals]:
+        """Interval lists to search: the industry's own plus General, or all when unknown or not given"""
+        key = (industry or "").strip().lower()
+        if key not in self.industries:
+            return list(self.industries.values())
+        return [self.industries[name] for name in dict.fromkeys([key, GENERAL_INDUSTRY.lower()])
+                if name in self.industries]
+
+    def overlapping(self, low: float, high: float, industry: str = None) -> List[Dict[str, Any]]:
+        """All patterns whose range overlaps [low, high], for `industry` (and General) when given"""
+        with self._lock:
+            matches = [entry for group in self._groups(industry) for entry in group.overlapping(low, high)]
+        return sorted(matches, key=lambda entry: (entry["low"], entry["id"]))
+
+    def lookup(self, score: float, n_results: int = 3, industry: str = None) -> List[Dict[str, Any]]:
+        """Patterns containing `score` (narrowest range first), topped up with the nearest ranges"""
+        containing = sorted(
+            self.overlapping(score, score, industry),
+            key=lambda entry: (entry["high"] - entry["low"], entry["id"])
+        )
+        if len(containing) >= n_results:
+            return containing[:n_results]
+
+        chosen = {entry["id"] for entry in containing}
+        with self._lock:
+            others = [entry for group in self._groups(industry) for entry in group.entries if entry["id"] not in chosen]
+        others.sort(key=lambda entry: (max(entry["low"] - score, score - entry["high"]), entry["id"]))
+        return containing + others[:n_results - len(containing)]
+
+    def match_industry(self, text: str) -> Optional[str]:
+        """Indexed industry named most often in `text` (e.g. a job description), General excluded"""
+        text = (text or "").lower()
+        with self._lock:
+            counts = {
+                group.entries[0]["industry"]: len(re.findall(rf"\b{re.escape(name)}\b", text))
+                for name, group in self.industries.items()
+                if name != GENERAL_INDUSTRY.lower() and group.entries
+            }
+        best = max(counts, key=counts.get, default=None)
+        return best if best is not None and counts[best] > 0 else None
+
+    @staticmethod
+    def as_query_result(entries: List[Dict[str, Any]]) -> Dict[str, List]:
+        """Shape entries like a single-query collection.query() response"""
+        return {
+            "ids": [[entry["id"] for entry in entries]],
+            "documents": [[entry["document"] for entry in entries]],
+            "metadatas": [[entry["metadata"] for entry in entries]]
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(group.entries) for group in self.industries.values())
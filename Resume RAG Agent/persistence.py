@@ -0,0 +1,276 @@
+import os
+import glob
+import json
+import time
+import queue
+import uuid
+import atexit
+import threading
+
+from typing import Any, Callable, Dict, List
+from db import SessionLocal
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEAD_LETTER_PATH = os.getenv("WRITE_BEHIND_DEAD_LETTER", "write_behind_dead_letter.jsonl")
+JOURNAL_DIR = os.getenv("WRITE_BEHIND_JOURNAL_DIR",
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), "write_behind_journal"))
+
+def _try_lock(f) -> bool:
+    """Take an exclusive lock on an open file without waiting; it is held until the file is closed"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+class WriteBehindQueue:
+    """
+    Background writer that groups database writes from many sessions into batched transactions
+    Units are plain dicts ({"kind": ..., "id": ..., **payload}) handled by a registered writer. Each unit
+    is appended to a journal file before it is queued and marked done once its transaction commits;
+    units still pending in the journal when the process died are re-queued on the next start, so delivery
+    is at-least-once across crashes (a unit committed just before a crash may be written twice). The journal
+    is flushed to the OS on every append but not fsynced, so a host crash can still lose the last writes.
+    Every process journals to its own locked file in `journal_dir`; a journal whose lock can be taken
+    belongs to a dead process, and its pending units are moved into the live process's journal.
+    A batch that fails is retried, then written unit by unit, and units that still fail go to a
+    dead-letter file for replay.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_pending: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 0.5, max_retries: int = 3, submit_timeout: float = 5.0,
+                 journal_dir: str = JOURNAL_DIR):
+        self.session_factory = session_factory
+        self.journal_dir = journal_dir
+        self.journal_path = None
+        self._journal = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.submit_timeout = submit_timeout
+        self.handlers = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._pending = 0
+        self._recovered = False
+        self.metrics = {"submitted": 0, "written": 0, "batches": 0, "retries": 0, "dead_lettered": 0, "recovered": 0}
+
+    def register(self, kind: str, handler: Callable[[Any, Dict[str, Any]], None]):
+        """`handler(session, unit)` adds the unit's rows to the session without committing"""
+        self.handlers[kind] = handler
+
+    def _open_journal(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.journal_path = os.path.join(self.journal_dir, f"journal-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+        self._journal = open(self.journal_path, "a+", encoding="utf-8")
+        if not _try_lock(self._journal):
+            raise RuntimeError(f"Could not lock write-behind journal {self.journal_path}")
+
+    def _append_journal(self, record: Dict[str, Any]):
+        self._journal.write(json.dumps(record, default=str) + "\n")
+        self._journal.flush()
+
+    def _journal_unit(self, unit: Dict[str, Any]):
+        with self._journal_lock:
+            self._append_journal({"unit": unit})
+            self._pending += 1
+
+    def _acknowledge(self, units: List[Dict[str, Any]]):
+        """Mark units done; once nothing is pending the journal is truncated"""
+        with self._journal_lock:
+            self._pending -= len(units)
+            if self._pending <= 0:
+                self._pending = 0
+                self._journal.seek(0)
+                self._journal.truncate()
+            else:
+                self._append_journal({"done": [unit["id"] for unit in units]})
+
+    @staticmethod
+    def _pending_units(f) -> Dict[str, Dict[str, Any]]:
+        pending = {}
+        f.seek(0)
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append
+                continue
+            if "unit" in record:
+                pending[record["unit"]["id"]] = record["unit"]
+            for unit_id in record.get("done", []):
+                pending.pop(unit_id, None)
+        return pending
+
+    def _recover(self) -> List[Dict[str, Any]]:
+        """Units journaled by processes that died before they were acknowledged"""
+        recovered = []
+        for path in glob.glob(os.path.join(glob.escape(self.journal_dir), "journal-*.jsonl")):
+            if path == self.journal_path:
+                continue
+            try:
+                f = open(path, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with f:
+                # Locked by a live process, or already reclaimed by another one after we opened it
+                if not _try_lock(f):
+                    continue
+                try:
+                    if not os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                        continue
+                except FileNotFoundError:
+                    continue
+                pending = list(self._pending_units(f).values())
+                with self._journal_lock:
+                    for unit in pending:
+                        self._append_journal({"unit": unit})
+                    self._pending += len(pending)
+                recovered.extend(pending)
+                f.seek(0)
+                f.truncate()
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Windows won't remove an open file; the emptied journal is reclaimed again harmlessly
+                    pass
+        return recovered
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._journal is None:
+                self._open_journal()
+            if not self._recovered:
+                # Handlers are registered at import time, before the first submit
+                self._recovered = True
+                for unit in self._recover():
+                    self.metrics["recovered"] += 1
+                    if unit["kind"] in self.handlers:
+                        self._queue.put(unit)
+                    else:
+                        self._dead_letter(unit, ValueError(f"No write-behind handler registered for {unit['kind']}"))
+                        self._acknowledge([unit])
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, kind: str, **payload):
+        """Queue a unit for writing; blocks briefly when the queue is full, then writes inline"""
+        if kind not in self.handlers:
+            raise ValueError(f"No write-behind handler registered for {kind}")
+        unit = {"kind": kind, **payload, "id": uuid.uuid4().hex}
+        self._ensure_started()
+        self._journal_unit(unit)
+        self.metrics["submitted"] += 1
+        try:
+            self._queue.put(unit, timeout=self.submit_timeout)
+        except queue.Full:
+            # Backpressure: never grow past max_pending, pay the commit on the caller instead
+            self._write_batch([unit])
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _commit(self, units: List[Dict[str, Any]]):
+        session = self.session_factory()
+        try:
+            for unit in units:
+                self.handlers[unit["kind"]](session, unit)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        for attempt in range(self.max_retries):
+            try:
+                self._commit(batch)
+                self.metrics["written"] += len(batch)
+                self.metrics["batches"] += 1
+                self._acknowledge(batch)
+                return
+            except Exception as e:
+                self.metrics["retries"] += 1
+                print(f"Write-behind batch failed (attempt {attempt + 1}): {e}")
+                time.sleep(min(2 ** attempt * 0.1, 2.0))
+
+        # Isolate the failing units so the rest of the batch still lands
+        for unit in batch:
+            try:
+                self._commit([unit])
+                self.metrics["written"] += 1
+            except Exception as e:
+                self._dead_letter(unit, e)
+            self._acknowledge([unit])
+
+    def _dead_letter(self, unit: Dict[str, Any], error: Exception):
+        self.metrics["dead_lettered"] += 1
+        print(f"Write-behind unit failed permanently, saved to {DEAD_LETTER_PATH}: {error}")
+        with open(DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(unit, default=str) + "\n")
+
+    def replay_dead_letters(self) -> int:
+        """Re-submit units from the dead-letter file"""
+        if not os.path.exists(DEAD_LETTER_PATH):
+            return 0
+        with open(DEAD_LETTER_PATH, encoding="utf-8") as f:
+            units = [json.loads(line) for line in f if line.strip()]
+        os.remove(DEAD_LETTER_PATH)
+        for unit in units:
+            unit.pop("id", None)
+            self.submit(unit.pop("kind"), **unit)
+        return len(units)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every queued unit has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Flush outstanding writes and stop the writer thread"""
+        self.flush()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 4)
+        with self._journal_lock:
+            if self._journal is not None and self._pending == 0:
+                self._journal.close()
+                self._journal = None
+                os.remove(self.journal_path)
+
+
+# Process-wide queue shared by every Streamlit session
+write_behind = WriteBehindQueue()
+atexit.register(write_behind.close)
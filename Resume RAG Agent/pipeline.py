@@ -0,0 +1,174 @@
+import time
+import asyncio
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor, wait
+
+class StageFailed(Exception):
+    """Raised for a stage that failed, timed out, or could not run because a dependency failed"""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class Stage:
+    """A named unit of work; `func` is called with the outputs of `inputs` as keyword arguments
+    Inputs listed in `optional` are passed as None when their stage fails, instead of failing this one."""
+
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+                 timeout: Optional[float] = None, optional: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.timeout = timeout
+        self.optional = frozenset(optional)
+
+
+class PipelineRun:
+    """Outputs, errors and timings of one pipeline execution"""
+
+    def __init__(self, stages: Dict[str, Stage]):
+        self.stages = stages
+        self.outputs = {}
+        self.errors = {}
+        self.timings = {}
+        # Threads of timed out stages that were still running when the run returned
+        self.abandoned = []
+        self.started_at = time.monotonic()
+        self.wall_seconds = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for abandoned stage threads, returns True once none is still running"""
+        _, running = wait(self.abandoned, timeout=timeout)
+        return not running
+
+    def critical_path(self) -> List[str]:
+        """Longest dependency chain: walk back from the last stage to finish via its latest-finishing input"""
+        finished = [name for name in self.stages if name in self.timings]
+        if not finished:
+            return []
+        current = max(finished, key=lambda name: self.timings[name][1])
+        path = [current]
+        while True:
+            parents = [name for name in self.stages[current].inputs if name in self.timings]
+            if not parents:
+                break
+            current = max(parents, key=lambda name: self.timings[name][1])
+            path.append(current)
+        return path[::-1]
+
+    def report(self) -> Dict[str, Any]:
+        durations = {name: round(end - start, 3) for name, (start, end) in self.timings.items()}
+        path = self.critical_path()
+        return {
+            "wall_seconds": round(self.wall_seconds, 3),
+            "sum_of_stages_seconds": round(sum(durations.values()), 3),
+            "critical_path": path,
+            "critical_path_seconds": round(sum(durations[name] for name in path), 3),
+            "stages": durations,
+            "failed": {name: str(error) for name, error in self.errors.items()}
+        }
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [
+            f"Pipeline: {report['wall_seconds']:.2f}s wall, {report['sum_of_stages_seconds']:.2f}s summed over stages",
+            f"Critical path ({report['critical_path_seconds']:.2f}s): " + " → ".join(
+                f"{name} {report['stages'][name]:.2f}s" for name in report["critical_path"]
+            )
+        ]
+        for name, error in report["failed"].items():
+            lines.append(f"Failed: {error}")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    DAG of stages run by an asyncio scheduler
+    Each stage starts as soon as its inputs are available and runs in a worker thread, so independent
+    stages overlap. A stage that raises or exceeds its timeout fails, and so does everything downstream.
+    A timed out stage's thread is abandoned rather than interrupted, its result is discarded; the
+    run lists those threads in `abandoned` so callers can hold shared resources until they finish.
+    """
+
+    def __init__(self, on_thread_start: Callable[[], None] = None, max_workers: int = 8):
+        # Called in each worker thread before the stage runs, e.g. to attach a Streamlit script context
+        self.on_thread_start = on_thread_start
+        self.max_workers = max_workers
+        self.stages = {}
+
+    def add(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+            timeout: Optional[float] = None, optional: Sequence[str] = ()) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage {name}")
+        self.stages[name] = Stage(name, func, inputs, timeout, optional)
+        return self
+
+    def _validate(self, provided: Dict[str, Any]):
+        for stage in self.stages.values():
+            for dependency in stage.inputs:
+                if dependency not in self.stages and dependency not in provided:
+                    raise ValueError(f"Stage {stage.name} depends on unknown input {dependency}")
+        # Kahn's algorithm to reject cycles before anything runs
+        remaining = {name: {d for d in stage.inputs if d in self.stages} for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Pipeline has a cycle among {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    def _call(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        if self.on_thread_start is not None:
+            self.on_thread_start()
+        return stage.func(**kwargs)
+
+    async def run(self, **provided) -> PipelineRun:
+        """Execute every stage; `provided` seeds inputs that no stage produces"""
+        self._validate(provided)
+        result = PipelineRun(self.stages)
+        result.outputs.update(provided)
+        tasks = {}
+        loop = asyncio.get_running_loop()
+        # Own executor so threads abandoned by a timeout don't hold up interpreter or loop shutdown
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+
+        async def execute(stage: Stage):
+            for dependency in stage.inputs:
+                if dependency in tasks:
+                    await tasks[dependency]
+                if dependency in result.errors and dependency not in stage.optional:
+                    result.errors[stage.name] = StageFailed(stage.name, f"dependency {dependency} failed")
+                    return
+            kwargs = {dependency: result.outputs.get(dependency) for dependency in stage.inputs}
+            start = time.monotonic()
+            future = executor.submit(self._call, stage, kwargs)
+            try:
+                result.outputs[stage.name] = await asyncio.wait_for(
+                    asyncio.wrap_future(future, loop=loop), timeout=stage.timeout
+                )
+            except asyncio.TimeoutError:
+                result.errors[stage.name] = StageFailed(stage.name, f"timed out after {stage.timeout}s")
+                if not future.done():
+                    result.abandoned.append(future)
+            except Exception as e:
+                result.errors[stage.name] = StageFailed(stage.name, repr(e))
+            finally:
+                result.timings[stage.name] = (start - result.started_at, time.monotonic() - result.started_at)
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            executor.shutdown(wait=False)
+        result.wall_seconds = time.monotonic() - result.started_at
+        return result
@@ -0,0 +1,128 @@
+import json
+import argparse
+import numpy as np
+import scipy.sparse as sp
+
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+from lexical import tokenize
+
+# Words that carry no signal for keyword screening
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our that the this to we will with you your "
+    "experience work working team role years ability strong skills".split()
+)
+
+def document_text(data: Any) -> str:
+    """Flatten extracted resume/job JSON (or plain text) into one string of its values"""
+    if isinstance(data, dict):
+        return " ".join(document_text(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return " ".join(document_text(item) for item in data)
+    return "" if data is None else str(data)
+
+def terms(data: Any) -> List[str]:
+    return [token for token in tokenize(document_text(data)) if len(token) > 1 and token not in STOP_WORDS]
+
+
+class BatchPreScorer:
+    """
+    Sparse BM25 pre-scoring of many resumes against one or more job descriptions
+    Resumes are indexed once into a CSR matrix of BM25 term weights; scoring a batch of JDs is a single
+    sparse matrix product, so the expensive agent scoring only has to run on the shortlist
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        self.ids = []
+        self.weights = None
+        self.presence = None
+
+    def fit(self, resumes: Sequence[Any], ids: Sequence[str] = None) -> "BatchPreScorer":
+        """Index resumes given as extracted resume dicts or raw text"""
+        self.ids = list(ids) if ids is not None else [str(i) for i in range(len(resumes))]
+        rows, columns, counts = [], [], []
+        lengths = np.zeros(len(resumes), dtype=np.float32)
+        for row, resume in enumerate(resumes):
+            tokens = terms(resume)
+            lengths[row] = len(tokens)
+            for token, count in Counter(tokens).items():
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                counts.append(count)
+
+        shape = (len(resumes), len(self.vocabulary))
+        rows = np.asarray(rows, dtype=np.int32)
+        columns = np.asarray(columns, dtype=np.int32)
+        tf = np.asarray(counts, dtype=np.float32)
+
+        document_frequency = np.bincount(columns, minlength=shape[1]).astype(np.float32)
+        idf = np.log1p((shape[0] - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        weights = idf[columns] * tf * (self.k1 + 1) / (tf + norm[rows])
+
+        self.weights = sp.csr_matrix((weights, (rows, columns)), shape=shape, dtype=np.float32)
+        self.presence = sp.csr_matrix((np.ones_like(tf), (rows, columns)), shape=shape, dtype=np.float32)
+        return self
+
+    def _query_matrix(self, job_descriptions: Sequence[Any]) -> tuple:
+        """Binary (terms x JDs) query matrix and each JD's number of distinct terms"""
+        rows, columns, sizes = [], [], []
+        for column, job in enumerate(job_descriptions):
+            unique = set(terms(job))
+            sizes.append(len(unique))
+            for token in unique:
+                if token in self.vocabulary:
+                    rows.append(self.vocabulary[token])
+                    columns.append(column)
+        query = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(self.vocabulary), len(job_descriptions))
+        )
+        return query, np.maximum(np.asarray(sizes, dtype=np.float32), 1.0)
+
+    def score(self, job_descriptions: Sequence[Any]) -> Dict[str, np.ndarray]:
+        """(resumes x JDs) BM25 scores and keyword coverage (0-100, share of JD terms found in the resume)"""
+        if self.weights is None:
+            raise ValueError("BatchPreScorer.fit must be called before scoring")
+        query, sizes = self._query_matrix(job_descriptions)
+        bm25 = (self.weights @ query).toarray()
+        coverage = (self.presence @ query).toarray() / sizes * 100
+        return {"bm25": bm25, "coverage": coverage}
+
+    def shortlist(self, job_description: Any, top_k: int = 50, min_coverage: float = 0.0) -> List[Dict[str, Any]]:
+        """Top-k resumes for one JD by BM25, highest first"""
+        scores = self.score([job_description])
+        bm25, coverage = scores["bm25"][:, 0], scores["coverage"][:, 0]
+        candidates = np.flatnonzero(coverage >= min_coverage)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-bm25[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.lexsort((candidates, -bm25[candidates]))]
+        return [
+            {"id": self.ids[row], "bm25": round(float(bm25[row]), 4), "coverage": round(float(coverage[row]), 1)}
+            for row in candidates
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shortlist resumes for a job description before agent scoring")
+    parser.add_argument("resumes", help="JSONL file, one extracted resume (or {\"id\", \"text\"}) per line")
+    parser.add_argument("job_description", help="Text file with the job description")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--min-coverage", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with open(args.resumes, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    with open(args.job_description, encoding="utf-8") as f:
+        job = f.read()
+
+    scorer = BatchPreScorer().fit(
+        [record.get("text", record) for record in records],
+        ids=[str(record.get("id", i)) for i, record in enumerate(records)]
+    )
+    for rank, candidate in enumerate(scorer.shortlist(job, args.top_k, args.min_coverage), start=1):
+        print(f"{rank:>4}  {candidate['id']:<24} bm25={candidate['bm25']:.3f}  coverage={candidate['coverage']:.1f}%")
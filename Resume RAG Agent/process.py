@@ -1,58 +1,97 @@
 import streamlit as st
-import PyPDF2 as pdf
-import mammoth
 import json
-from typing import Dict, Any
-import pickle
+from typing import Dict, Any, Tuple
+import os
 import hashlib
 from rag import RAGKnowledgeBase
+from analysis_context import AnalysisContext
+from cache import LRUCache, DiskCache
+from json_stream import parse_agent_reply
+from resume_fields import extract_resume_fields
+from stage_memo import memoized_stage
 
-#Convert documents to text
-def extract_text_from_pdf(uploaded_file) -> str:
-    """Extract text from a PDF file."""
-    reader = pdf.PdfReader(uploaded_file)
-    st.success("✅ Extracting text from resume")
-    text = ""
-    for page in range(len(reader.pages)):
-        page = reader.pages[page]
-        text += str(page.extract_text())
-    return text
-
-def extract_text_from_docx(uploaded_file) -> str:
-    """Extract text from a DOCX file."""
-    result = mammoth.extract_raw_text(uploaded_file)
-    return result.value
-
-def extract_text_from_file(uploaded_file) -> str:
-    """Extract from plain text file."""
-    if uploaded_file.type == "text/plain":
-        return str(uploaded_file.read(), "utf-8")
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", "score_cache.db")
+SCORE_CACHE_TTL = 30 * 24 * 3600
+# Extract resume fields and formatting issues in one agent call over the retrieved best practices,
+# rather than generating optimization recommendations first and feeding them to the extraction
+FUSED_RESUME_EXTRACTION = os.getenv("FUSED_RESUME_EXTRACTION", "1") == "1"
+# Bump when a stage's prompt or agent system message changes, so stored extractions are regenerated
+RESUME_PROMPT_VERSION = "resume-v6"
+JOB_PROMPT_VERSION = "job-v1"
+
+# Score cache: in-process LRU in front of a SQLite table keyed by content hash
+_score_memory = LRUCache(max_entries=2048)
+_score_disk = DiskCache(SCORE_CACHE_PATH, table="scores", max_entries=50000, ttl=SCORE_CACHE_TTL)
 
 #Process the resume and job description, generate ATS score    
 
-def process_resume(resume_text: str, resume_agent, coordinator, knowledge_base: RAGKnowledgeBase) -> Dict[str, Any]:
-    """Process resume using Autogen agents."""
-    
-    optimization_context = knowledge_base.get_resume_optimization_recommendations(resume_text)
+def process_resume(resume_text: str, resume_agent, coordinator, knowledge_base: RAGKnowledgeBase, context: AnalysisContext = None,
+                   prefetched: Dict[str, Dict] = None, fused: bool = FUSED_RESUME_EXTRACTION) -> Dict[str, Any]:
+    """Process resume using Autogen agents, reusing the stored extraction of an identical resume."""
+    version = f"{RESUME_PROMPT_VERSION}-fused" if fused else RESUME_PROMPT_VERSION
+    json_data = memoized_stage("resume", resume_text, version, lambda: _extract_resume(
+        resume_text, resume_agent, coordinator, knowledge_base, context, prefetched, fused
+    ))
+    st.success("✅ Processed resume")
+    return json_data
+
+def _resume_practices(knowledge_base: RAGKnowledgeBase, context: AnalysisContext, prefetched: Dict[str, Dict]) -> str:
+    """Recommendations this analysis already generated, otherwise the retrieved best practices, kept in the context"""
+    if context is not None and "optimization_recommendations" in context:
+        return context.sections()["optimization_recommendations"]
+    retrieved = (prefetched or {}).get("optimization_recommendations")
+    practices = lambda: "\n\n".join(knowledge_base.get_resume_best_practices(retrieved=retrieved))
+    return context.memoize("resume_best_practices", practices, private=True) if context is not None else practices()
+
+def _extract_resume(resume_text: str, resume_agent, coordinator, knowledge_base: RAGKnowledgeBase,
+                    context: AnalysisContext, prefetched: Dict[str, Dict], fused: bool) -> Tuple[Dict[str, Any], bool]:
+    # Contact details, sections and dates are extracted locally; the agent only reads the sections of
+    # the fields that are still missing or whose local extraction looked off
+    local = extract_resume_fields(resume_text)
+    if not fused and not local.missing:
+        return local.merge({}), True
+
+    if fused:
+        # One call: the agent reads the retrieved best practices itself and reports formatting issues
+        # alongside the fields, instead of waiting on a separate recommendations generation
+        fields = local.missing + ["Formatting Issues"]
+        rag_context = _resume_practices(knowledge_base, context, prefetched)
+    else:
+        fields = local.missing
+        rag_context = knowledge_base.get_resume_optimization_recommendations(
+            resume_text, retrieved=(prefetched or {}).get("optimization_recommendations"), context=context
+        )
+    # Structure is judged from the layout outline, so only the sections still to extract are sent
+    resume_section = local.gap_text(resume_text)
 
     prompt = f""" RAG CONTEXT - Resume Best Practices: 
-    {optimization_context} 
-    Extract structured data from the resume text: {resume_text} 
-    Use the above context to identify any formatting or structural issues.
+    {rag_context} 
+    Already extracted (do not repeat): {", ".join(local.confident) or "nothing"}
+    Layout: {local.outline(resume_text)}
+    Extract ONLY these fields: {", ".join(fields)}; use [] for fields the resume does not contain.
     """
+    if resume_section:
+        prompt += f"Resume text: {resume_section}\n"
+    prompt += "Use the above context to identify any formatting or structural issues.\n"
     response = coordinator.initiate_chat(
         resume_agent,
         message=prompt,
         max_turns=1
     )
     response_text = response.chat_history[-1]['content']
-    json_data = json.loads(response_text)
+    json_data, incomplete = parse_agent_reply(response_text, "resume")
     #st.json(json_data)
-    st.success("✅ Processed resume")
-    return json_data
+    # Local values can fill a failed reply's gaps, but only a reply with every requested field is worth storing
+    complete = not [name for name in incomplete if name in fields or name == "truncated"]
+    return local.merge(json_data), complete
 
 def process_job_description(jd_text: str, job_agent, coordinator) -> Dict[str, Any]:
-    """Process job description using Autogen agents."""
+    """Process job description using Autogen agents, reusing the stored extraction of an identical JD."""
+    json_data = memoized_stage("job", jd_text, JOB_PROMPT_VERSION, lambda: _extract_job(jd_text, job_agent, coordinator))
+    st.success("✅ Processed job description")
+    return json_data
+
+def _extract_job(jd_text: str, job_agent, coordinator) -> Tuple[Dict[str, Any], bool]:
     prompt = f"Extract key skills and requirements from the job description: {jd_text}"
     response = coordinator.initiate_chat(
         job_agent,
@@ -60,28 +99,37 @@ def process_job_description(jd_text: str, job_agent, coordinator) -> Dict[str, A
         max_turns=1
     )
     response_text = response.chat_history[-1]['content']
-    json_data = json.loads(response_text)
+    json_data, incomplete = parse_agent_reply(response_text, "job")
     #st.json(json_data)
-    st.success("✅ Processed job description")
-    return json_data
+    return json_data, not incomplete
 
 # CACHING FUNCTIONS FOR CONSISTENCY IN SCORES
 def get_cached_score(content_hash: str) -> Dict[str, Any]:
     """Retrieve cached score if exists"""
+    payload = _score_memory.get(content_hash)
+    if payload is None:
+        payload = _score_disk.get(content_hash)
+        if payload is None:
+            return None
+        _score_memory.set(content_hash, payload)
     try:
-        with open(f"score_cache_{content_hash}.pkl", "rb") as f:
-            return pickle.load(f)
-    except (FileNotFoundError, pickle.PickleError):
+        # Stored serialized so callers can't mutate the cached copy
+        return json.loads(payload)
+    except (TypeError, ValueError):
         return None
 
 def cache_score(content_hash: str, score_data: Dict[str, Any]):
     """Cache the score for future consistency"""
     try:
-        with open(f"score_cache_{content_hash}.pkl", "wb") as f:
-            pickle.dump(score_data, f)
+        payload = json.dumps(score_data, sort_keys=True)
+        _score_memory.set(content_hash, payload)
+        _score_disk.set(content_hash, payload)
     except Exception as e:
         print(f"Warning: Could not cache score: {e}")
 
+def score_cache_stats() -> Dict[str, Dict[str, int]]:
+    return {"memory": _score_memory.stats(), "disk": _score_disk.stats()}
+
     # NORMALIZE AND STANDARDIZE INPUT DATA
 def normalize_data(data):
         """Ensure consistent data format with deep normalization"""
@@ -134,9 +182,9 @@ def normalize_data(data):
             return data
 
   # CREATE DETERMINISTIC HASH FOR CACHING
-def create_content_hash(resume_data, job_data):
-    normalized_resume = normalize_data(resume_data)
-    normalized_job = normalize_data(job_data)
+def create_content_hash(resume_data, job_data, normalized: bool = False):
+    normalized_resume = resume_data if normalized else normalize_data(resume_data)
+    normalized_job = job_data if normalized else normalize_data(job_data)
 
         # Create a consistent string representation
     resume_str = json.dumps(normalized_resume, sort_keys=True)
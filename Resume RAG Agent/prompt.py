@@ -0,0 +1,136 @@
+import json
+import logging
+
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # Without tiktoken fall back to the usual ~4 characters per token estimate
+    _encoding = None
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text` for the gpt-4o family"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` down to at most `max_tokens` tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens]) + "..."
+    return text[:max_tokens * 4] + "..."
+
+def _drop_empty(data: Any) -> Any:
+    if isinstance(data, dict):
+        cleaned = {key: _drop_empty(value) for key, value in data.items()}
+        return {key: value for key, value in cleaned.items() if value not in (None, "", [], {})}
+    if isinstance(data, list):
+        cleaned = [_drop_empty(item) for item in data]
+        return [item for item in cleaned if item not in (None, "", [], {})]
+    return data
+
+def compact_json(data: Any) -> str:
+    """Minified, key-sorted JSON with empty fields dropped"""
+    return json.dumps(_drop_empty(data), sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from named sections under a token budget
+    Sections render in the order they were added. Required sections (priority=None) are never
+    trimmed; when over budget the lowest-priority section is trimmed first, dropping retrieved
+    context items from the least relevant end and truncating plain text sections.
+    """
+
+    def __init__(self, budget: int, name: str = "prompt"):
+        self.budget = budget
+        self.name = name
+        self.sections = []
+        self._seen = set()
+
+    def _is_duplicate(self, text: str) -> bool:
+        key = " ".join(text.lower().split())
+        if key in self._seen:
+            return True
+        self._seen.add(key)
+        return False
+
+    def add(self, label: str, text: str, heading: str = None, priority: Optional[int] = None,
+            max_tokens: int = None) -> "PromptBuilder":
+        """Add a text section, optionally capped at `max_tokens`"""
+        text = (text or "").strip()
+        if not text or self._is_duplicate(text):
+            return self
+        if max_tokens is not None:
+            text = truncate_tokens(text, max_tokens)
+        self.sections.append({"label": label, "heading": heading, "items": [text], "tokens": [count_tokens(text)],
+                              "priority": priority, "context": False})
+        return self
+
+    def add_context(self, label: str, items: List[str], heading: str = None, priority: int = 0) -> "PromptBuilder":
+        """Add retrieved context items ranked best first; repeated items are skipped"""
+        items = [item.strip() for item in items if item and item.strip()]
+        items = [item for item in items if not self._is_duplicate(item)]
+        if items:
+            self.sections.append({"label": label, "heading": heading, "items": items,
+                                  "tokens": [count_tokens(item) for item in items],
+                                  "priority": priority, "context": True})
+        return self
+
+    @staticmethod
+    def _render(section: Dict[str, Any]) -> str:
+        body = "\n\n".join(section["items"])
+        return f"{section['heading']}:\n{body}" if section["heading"] else body
+
+    @staticmethod
+    def _tokens(section: Dict[str, Any]) -> int:
+        """Section size from the cached per-item counts, plus the heading and item separators"""
+        if not section["items"]:
+            return 0
+        heading = count_tokens(f"{section['heading']}:\n") if section["heading"] else 0
+        return heading + sum(section["tokens"]) + len(section["items"]) - 1
+
+    def _usage(self) -> Dict[str, int]:
+        return {section["label"]: self._tokens(section) for section in self.sections}
+
+    def _trim(self):
+        # Items are counted once when added; dropping one just subtracts its count
+        usage = self._usage()
+        total = sum(usage.values())
+        while True:
+            overflow = total - self.budget
+            trimmable = [s for s in self.sections if s["priority"] is not None and s["items"]]
+            if overflow <= 0 or not trimmable:
+                return
+            # Lowest priority first; among equals the section added last
+            section = min(reversed(trimmable), key=lambda s: s["priority"])
+            if section["context"] or len(section["items"]) > 1:
+                section["items"].pop()
+                # The dropped item and its separator
+                size = usage[section["label"]] - section["tokens"].pop() - 1 if section["items"] else 0
+            else:
+                remaining = usage[section["label"]] - overflow
+                text = truncate_tokens(section["items"][0], remaining - 8)
+                shrunk = text and text != section["items"][0]
+                section["items"] = [text] if remaining > 32 and shrunk else []
+                section["tokens"] = [count_tokens(text)] if section["items"] else []
+                size = self._tokens(section)
+            total += size - usage[section["label"]]
+            usage[section["label"]] = size
+
+    def build(self) -> str:
+        self._trim()
+        self.sections = [section for section in self.sections if section["items"]]
+        usage = self._usage()
+        logger.info("%s prompt tokens: %d/%d %s", self.name, sum(usage.values()), self.budget, usage)
+        return "\n\n".join(self._render(section) for section in self.sections)
@@ -1,25 +1,111 @@
 import chromadb
 import streamlit as st
 import os
+import json
+import hashlib
+import time
+import threading
+import queue
 import google.generativeai as genai
 import openai
 
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from chromadb.utils import embedding_functions
+from embeddings import CachedEmbeddingFunction
+from cache import LRUCache, DiskCache
+from vector_index import NumpyCollection
+from prompt import PromptBuilder
+from skill_graph import SkillGraph
+from patterns_index import ScoreRangeIndex
+from feedback_ingest import FeedbackIngestQueue
+from analysis_context import AnalysisContext
+from lexical import SkillLexicalIndex, reciprocal_rank_fusion, flatten_skills
 
 load_dotenv()
 #api_key=os.getenv("GOOGLE_API_KEY")
 api_key=os.getenv("OPENAI_API_KEY")
 
+# On-disk location of the persistent knowledge base
+KB_PATH = os.getenv("RAG_KB_PATH", "rag_kb")
+
+# Sampling parameters pinned for consistent generations
+LLM_PARAMS = {
+    "model": "gpt-4o-mini",
+    "temperature": 0.3,
+    "seed": 42,
+    "top_p": 0.1
+}
+
+# Below this share of lexically matched skills, skill retrieval is fused with vector search
+LEXICAL_RECALL_THRESHOLD = 0.6
+
+# Per-call prompt budget in tokens; retrieved context is trimmed first when exceeded
+PROMPT_BUDGET = int(os.getenv("RAG_PROMPT_BUDGET", 3000))
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+
+# RAG analysis sections in display order with their progress labels
+RAG_SECTIONS = {
+    "industry_insights": "Analyzing industry requirements...",
+    "optimization_recommendations": "Generating optimization recommendations...",
+    "skill_matching": "Performing advanced skill matching...",
+    "scoring_insights": "Analyzing historical scoring patterns..."
+}
+
+SECTION_UNAVAILABLE = "This insight is temporarily unavailable. Please try the analysis again."
+
+def _join(value: Any) -> str:
+    """Join list values for document text, strings pass through unchanged"""
+    return ", ".join(str(item) for item in value) if isinstance(value, list) else str(value)
+
+# Per-collection index backend: "chroma" (default), "numpy", "numpy-float16" or "numpy-int8"
+# e.g. RAG_INDEX_BACKENDS="skills_taxonomy=numpy,best_practices=numpy-int8"
+INDEX_BACKENDS = dict(
+    item.strip().split("=", 1) for item in os.getenv("RAG_INDEX_BACKENDS", "").split(",") if "=" in item
+)
+
+# Attribute holding each collection on RAGKnowledgeBase
+COLLECTION_ATTRS = {
+    "industry_requirements": "industry_collection",
+    "best_practices": "best_practices_collection",
+    "skills_taxonomy": "skills_collection",
+    "historical_patterns": "patterns_collection"
+}
+
+# Builders turning a raw record into (id, document, metadata) for each collection
+RECORD_BUILDERS = {
+    "industry_requirements": lambda item: (
+        item["id"], item["requirements"], {k: v for k, v in item.items() if k != "requirements"}
+    ),
+    "best_practices": lambda item: (
+        item["id"], item["practice"], {k: v for k, v in item.items() if k != "practice"}
+    ),
+    "skills_taxonomy": lambda item: (
+        item["id"], f"{item['skill']}: {item['category']} - {_join(item['related_skills'])}", dict(item)
+    ),
+    "historical_patterns": lambda item: (
+        item["id"], f"Score {item['score_range']}: {item['common_factors']}",
+        {k: v for k, v in item.items() if k != "common_factors"}
+    ),
+}
+
 class RAGKnowledgeBase:
     """RAG-Enhanced Knowledge Base for Resume Analysis Integration"""
     
-    def __init__(self):
-        self.client = chromadb.Client()
-        self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=api_key,
+    def __init__(self, persist_directory: str = KB_PATH, request_timeout: float = 60,
+                 use_response_cache: bool = True, index_backends: Dict[str, str] = None):
+        # Persistent store so new sessions open the existing index instead of re-embedding
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        # Repeated texts (e.g. the same job description) are served from the embedding cache
+        self.embedding_function = CachedEmbeddingFunction(
+            embedding_functions.OpenAIEmbeddingFunction(
+                api_key=api_key,
+                model_name="text-embedding-ada-002"
+            ),
             model_name="text-embedding-ada-002"
         )
         # Initialize GoogleAI for generation
@@ -28,8 +114,39 @@ class RAGKnowledgeBase:
         
         # Initialize OpenAI
         self.llm = openai
+        self.request_timeout = request_timeout
+        
+        # Deterministic generations are cached across reruns and repeat analyses
+        self.use_response_cache = use_response_cache
+        self.response_memory = LRUCache(max_entries=1024)
+        self.response_cache = DiskCache(LLM_CACHE_PATH, table="llm_responses", max_entries=20000, ttl=LLM_CACHE_TTL)
+        self._response_cache_lock = threading.Lock()
+        self._response_cache_metrics = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        self._stream_metrics = {"streams": 0, "ttft_seconds": 0.0, "total_seconds": 0.0}
         self.initialize_collections()
         self.populate_knowledge_base()
+        self._apply_index_backends(INDEX_BACKENDS if index_backends is None else index_backends, persist_directory)
+        self.skill_index = SkillLexicalIndex.from_collection(self.skills_collection)
+        self.skill_graph = SkillGraph.from_collection(self.skills_collection)
+        self.pattern_index = ScoreRangeIndex.from_collection(self.patterns_collection)
+        self.feedback_queue = FeedbackIngestQueue(self).register_shutdown()
+
+    def _apply_index_backends(self, backends: Dict[str, str], persist_directory: str):
+        """Serve selected collections from a memory-mapped NumPy index instead of Chroma's HNSW"""
+        for name, backend in backends.items():
+            if backend == "chroma":
+                continue
+            kind, _, dtype = backend.partition("-")
+            if kind != "numpy":
+                raise ValueError(f"Unknown index backend for {name}: {backend}")
+            facade = NumpyCollection(
+                self.collections[name],
+                self.embedding_function,
+                os.path.join(persist_directory, "numpy_index", name),
+                dtype=dtype or "float32"
+            )
+            self.collections[name] = facade
+            setattr(self, COLLECTION_ATTRS[name], facade)
 
     def _process_metadata(self, metadata: Dict) -> Dict:
         """Convert lists in metadata to comma-separated strings"""
@@ -41,6 +158,48 @@ class RAGKnowledgeBase:
                 processed[key] = value
         return processed
 
+    @staticmethod
+    def _fingerprint(payload: Any) -> str:
+        """Deterministic hash of a JSON-serializable payload"""
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _reconcile_collection(self, collection, records: List[tuple]) -> int:
+        """Upsert seed records whose content changed since the last run, return number written"""
+        fingerprints = {
+            record_id: self._fingerprint([document, metadata])
+            for record_id, document, metadata in records
+        }
+        seed_fingerprint = self._fingerprint(sorted(fingerprints.items()))
+
+        # Fast path: seed payload unchanged, the index on disk is already current
+        if (collection.metadata or {}).get("seed_fingerprint") == seed_fingerprint:
+            return 0
+
+        existing = collection.get(where={"source": "seed"}, include=["metadatas"])
+        stored = {
+            record_id: metadata.get("seed_fingerprint")
+            for record_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        changed = [record for record in records if stored.get(record[0]) != fingerprints[record[0]]]
+        if changed:
+            collection.upsert(
+                ids=[record_id for record_id, _, _ in changed],
+                documents=[document for _, document, _ in changed],
+                metadatas=[
+                    {**self._process_metadata(metadata), "source": "seed", "seed_fingerprint": fingerprints[record_id]}
+                    for record_id, _, metadata in changed
+                ]
+            )
+
+        # Drop seed records that were removed from the payload, user-contributed records are kept
+        removed = [record_id for record_id in stored if record_id not in fingerprints]
+        if removed:
+            collection.delete(ids=removed)
+
+        collection.modify(metadata={"seed_fingerprint": seed_fingerprint})
+        return len(changed)
+
     def _generate_llm_response_gemini(self, prompt: str, max_tokens: int = 1000) -> str:
         """Generate response using Gemini's LLM"""
         try:
@@ -59,59 +218,173 @@ class RAGKnowledgeBase:
             st.error(f"Error generating LLM response: {e}")
             return "Error generating intelligent insights. Using basic analysis." 
     
-    def _generate_llm_response(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Generate response using OpenAI's API"""
+    def _response_cache_key(self, prompt: str, max_tokens: int) -> str:
+        return self._fingerprint({
+            **LLM_PARAMS,
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "max_tokens": max_tokens
+        })
+
+    def _cached_response(self, cache_key: str) -> Dict[str, Any]:
+        """Cached {"text", "latency"} entry from the memory tier, then SQLite, or None"""
+        entry = self.response_memory.get(cache_key)
+        if entry is not None and entry[0] > time.time():
+            return json.loads(entry[1])
+        payload = self.response_cache.get(cache_key)
+        if payload is None:
+            return None
+        cached = json.loads(payload)
+        # Memory entries expire with the row they were read from, not LLM_CACHE_TTL after promotion
+        self.response_memory.set(cache_key, (cached.get("created_at", time.time()) + LLM_CACHE_TTL, payload))
+        return cached
+
+    def _cache_response(self, cache_key: str, text: str, latency: float):
+        created_at = time.time()
+        payload = json.dumps({"text": text, "latency": latency, "created_at": created_at}).encode("utf-8")
+        self.response_memory.set(cache_key, (created_at + LLM_CACHE_TTL, payload))
+        self.response_cache.set(cache_key, payload)
+
+    def _record_cache_lookup(self, hit: bool, saved_seconds: float = 0.0):
+        with self._response_cache_lock:
+            self._response_cache_metrics["hits" if hit else "misses"] += 1
+            self._response_cache_metrics["saved_seconds"] += saved_seconds
+
+    def response_cache_stats(self) -> Dict[str, float]:
+        """Hit ratio and generation time saved by the LLM response cache"""
+        with self._response_cache_lock:
+            metrics = dict(self._response_cache_metrics)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_ratio"] = round(metrics["hits"] / lookups, 3) if lookups else 0.0
+        metrics["saved_seconds"] = round(metrics["saved_seconds"], 2)
+        return metrics
+
+    def _generate_llm_response(self, prompt: str, max_tokens: int = 1000, use_cache: bool = True) -> str:
+        """Generate response using OpenAI's API, served from the response cache when possible"""
+        use_cache = use_cache and self.use_response_cache
+        cache_key = self._response_cache_key(prompt, max_tokens)
+        
+        if use_cache:
+            entry = self._cached_response(cache_key)
+            if entry is not None:
+                self._record_cache_lookup(True, entry["latency"])
+                return entry["text"]
+            self._record_cache_lookup(False)
+        
         try:
+            start = time.perf_counter()
             response = self.llm.chat.completions.create(
-                model="gpt-4o-mini",  
                 messages=[
                     {
                         "role": "user", 
                         "content": prompt
                     }
                 ],
-                temperature=0.3,  
                 max_tokens=max_tokens,
-                # For consistency 
-                seed=42,  
-                top_p=0.1  
+                timeout=self.request_timeout,
+                # Model, low temperature, fixed seed and low top_p for consistency
+                **LLM_PARAMS
             )
+            text = response.choices[0].message.content.strip()
             
-            return response.choices[0].message.content.strip()
+            # Never cache errors or empty completions
+            if use_cache and text:
+                self._cache_response(cache_key, text, time.perf_counter() - start)
+            return text
             
         except Exception as e:
             print(f"Error generating OpenAI response: {e}")
             return ""
 
-    def initialize_collections(self):
-        """Initialize ChromaDB collections for RAG knowledge base"""
+    def _stream_llm_response(self, prompt: str, max_tokens: int = 1000, use_cache: bool = True) -> Iterator[str]:
+        """Yield response tokens as they arrive; the assembled text is cached like _generate_llm_response"""
+        use_cache = use_cache and self.use_response_cache
+        cache_key = self._response_cache_key(prompt, max_tokens)
+        
+        if use_cache:
+            entry = self._cached_response(cache_key)
+            if entry is not None:
+                self._record_cache_lookup(True, entry["latency"])
+                yield entry["text"]
+                return
+            self._record_cache_lookup(False)
+        
+        start = time.perf_counter()
+        ttft = None
+        parts = []
         try:
-            self.industry_collection = self.client.create_collection(
-                name="industry_requirements",
-                embedding_function=self.embedding_function
-            )
-            
-            self.best_practices_collection = self.client.create_collection(
-                name="best_practices",
-                embedding_function=self.embedding_function
-            )
-            
-            self.skills_collection = self.client.create_collection(
-                name="skills_taxonomy",
-                embedding_function=self.embedding_function
-            )
-            
-            self.patterns_collection = self.client.create_collection(
-                name="historical_patterns",
-                embedding_function=self.embedding_function
+            stream = self.llm.chat.completions.create(
+                messages=[
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                max_tokens=max_tokens,
+                timeout=self.request_timeout,
+                stream=True,
+                **LLM_PARAMS
             )
-            
-        except Exception:
-            # Collections might already exist
-            self.industry_collection = self.client.get_collection("industry_requirements")
-            self.best_practices_collection = self.client.get_collection("best_practices")
-            self.skills_collection = self.client.get_collection("skills_taxonomy")
-            self.patterns_collection = self.client.get_collection("historical_patterns")
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if not token:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(token)
+                yield token
+        except Exception as e:
+            print(f"Error streaming OpenAI response: {e}")
+            return
+        
+        latency = time.perf_counter() - start
+        with self._response_cache_lock:
+            self._stream_metrics["streams"] += 1
+            self._stream_metrics["ttft_seconds"] += ttft or latency
+            self._stream_metrics["total_seconds"] += latency
+        
+        text = "".join(parts).strip()
+        if use_cache and text:
+            self._cache_response(cache_key, text, latency)
+
+    def stream_stats(self) -> Dict[str, float]:
+        """Average time-to-first-token versus total generation time for streamed responses"""
+        with self._response_cache_lock:
+            metrics = dict(self._stream_metrics)
+        streams = metrics["streams"]
+        return {
+            "streams": streams,
+            "avg_ttft_seconds": round(metrics["ttft_seconds"] / streams, 3) if streams else 0.0,
+            "avg_total_seconds": round(metrics["total_seconds"] / streams, 3) if streams else 0.0
+        }
+
+    def initialize_collections(self):
+        """Initialize ChromaDB collections for RAG knowledge base"""
+        self.industry_collection = self.client.get_or_create_collection(
+            name="industry_requirements",
+            embedding_function=self.embedding_function
+        )
+        
+        self.best_practices_collection = self.client.get_or_create_collection(
+            name="best_practices",
+            embedding_function=self.embedding_function
+        )
+        
+        self.skills_collection = self.client.get_or_create_collection(
+            name="skills_taxonomy",
+            embedding_function=self.embedding_function
+        )
+        
+        self.patterns_collection = self.client.get_or_create_collection(
+            name="historical_patterns",
+            embedding_function=self.embedding_function
+        )
+
+        self.collections = {
+            "industry_requirements": self.industry_collection,
+            "best_practices": self.best_practices_collection,
+            "skills_taxonomy": self.skills_collection,
+            "historical_patterns": self.patterns_collection
+        }
 
     def populate_knowledge_base(self):
         """Populate knowledge base with comprehensive data"""
@@ -266,333 +539,424 @@ class RAGKnowledgeBase:
             }
         ]
         
-        # Populate collections
+        # Reconcile collections against the seed data, only changed records are embedded
         try:
-            # Add industry requirements
-            if self.industry_collection.count() == 0:
-                for item in industry_data:
-                    metadata = {k: v for k, v in item.items() if k != "requirements"}
-                    processed_metadata = self._process_metadata(metadata)
-                    
-                    self.industry_collection.add(
-                        documents=[item["requirements"]],
-                        metadatas=[processed_metadata],
-                        ids=[item["id"]]
-                    )
-            
-            # Add best practices
-            if self.best_practices_collection.count() == 0:
-                for item in best_practices_data:
-                    metadata = {k: v for k, v in item.items() if k != "practice"}
-                    processed_metadata = self._process_metadata(metadata)
-                    
-                    self.best_practices_collection.add(
-                        documents=[item["practice"]],
-                        metadatas=[processed_metadata],
-                        ids=[item["id"]]
-                    )
-            
-            # Add skills taxonomy
-            if self.skills_collection.count() == 0:
-                for item in skills_data:
-                    metadata = {k: v for k, v in item.items()}
-                    processed_metadata = self._process_metadata(metadata)
-                    
-                    self.skills_collection.add(
-                        documents=[f"{item['skill']}: {item['category']} - {', '.join(item['related_skills'])}"],
-                        metadatas=[processed_metadata],
-                        ids=[item["id"]]
-                    )
-            
-            # Add historical patterns
-            if self.patterns_collection.count() == 0:
-                for item in patterns_data:
-                    metadata = {k: v for k, v in item.items() if k != "common_factors"}
-                    processed_metadata = self._process_metadata(metadata)
-                    
-                    self.patterns_collection.add(
-                        documents=[f"Score {item['score_range']}: {item['common_factors']}"],
-                        metadatas=[processed_metadata],
-                        ids=[item["id"]]
-                    )
+            seed_data = {
+                "industry_requirements": industry_data,
+                "best_practices": best_practices_data,
+                "skills_taxonomy": skills_data,
+                "historical_patterns": patterns_data
+            }
+            for name, data in seed_data.items():
+                build = RECORD_BUILDERS[name]
+                self._reconcile_collection(self.collections[name], [build(item) for item in data])
                         
         except Exception as e:
-            st.warning(f"Knowledge base already populated or error occurred: {e}")
+            st.warning(f"Error reconciling knowledge base: {e}")
+
+    def bulk_load(self, collection_name: str, path: str, **loader_options) -> Dict[str, float]:
+        """Stream a JSONL/CSV file of records into a collection in batches"""
+        from ingest import BulkLoader
+        
+        loader = BulkLoader(self, collection_name, **loader_options)
+        stats = loader.load(path)
+        if collection_name == "skills_taxonomy":
+            self.skill_index = SkillLexicalIndex.from_collection(self.skills_collection)
+            self.skill_graph = SkillGraph.from_collection(self.skills_collection)
+        elif collection_name == "historical_patterns":
+            self.pattern_index = ScoreRangeIndex.from_collection(self.patterns_collection)
+        return stats
 
     # =============================================================================
     # RAG KNOWLEDGE BASE INTEGRATION METHODS
     # =============================================================================
     
-    def get_intelligent_industry_insights(self, job_description: str, resume_text: str = None) -> str:
-        """RAG: Industry-specific requirements analysis"""
+    def batch_query(self, requests: Dict[Any, tuple]) -> Dict[Any, Dict[str, List]]:
+        """
+        Run many retrievals with a single embedding call
+        `requests` maps a key to (collection, query_text, n_results); results come back under the
+        same key, shaped like a single-query collection.query() response
+        """
+        texts = list(dict.fromkeys(query for _, query, _ in requests.values()))
+        vectors = dict(zip(texts, self.embedding_function(texts))) if texts else {}
+        
+        # Group by collection so each one is searched once for all of its queries
+        groups = {}
+        for key, (collection, query, n_results) in requests.items():
+            groups.setdefault(collection.name, (collection, []))[1].append((key, query, n_results))
+        
+        results = {}
+        for collection, items in groups.values():
+            queries = list(dict.fromkeys(query for _, query, _ in items))
+            response = collection.query(
+                query_embeddings=[vectors[query] for query in queries],
+                n_results=max(n_results for _, _, n_results in items),
+                include=["documents", "metadatas", "distances"]
+            )
+            for key, query, n_results in items:
+                row = queries.index(query)
+                results[key] = {
+                    field: [response[field][row][:n_results]]
+                    for field in ("ids", "documents", "metadatas", "distances")
+                }
+        return results
+
+    def _industry_queries(self, job_description: str) -> Dict[str, tuple]:
+        return {"industry": (self.industry_collection, job_description, 3)}
+
+    def _optimization_queries(self) -> Dict[str, tuple]:
+        return {"practices": (self.best_practices_collection, "resume formatting keywords achievements ATS optimization", 4)}
+
+    def _skill_queries(self, resume_skills: List[str], job_description: str) -> Dict[str, tuple]:
+        resume_skills = flatten_skills(resume_skills)
+        queries = {"industry": (self.industry_collection, job_description, 2)}
+        # Skill names are mostly exact tokens, only pay for an embedding when the lexical index misses
+        if resume_skills and self.skill_index.recall(resume_skills) < LEXICAL_RECALL_THRESHOLD:
+            queries["skills"] = (self.skills_collection, " ".join(resume_skills), 5)
+        return queries
+
+    def _hybrid_skill_results(self, resume_skills: List[str], vector_results: Dict[str, List] = None) -> Dict[str, List]:
+        """BM25 skill matches, fused with vector matches by reciprocal rank when those were retrieved"""
+        lexical_ids = self.skill_index.search(resume_skills, n_results=5)
+        if not vector_results:
+            return self.skill_index.as_query_result(lexical_ids)
+        fused = reciprocal_rank_fusion([lexical_ids, vector_results["ids"][0]])[:5]
+        return self.skill_index.as_query_result(fused, fallback=vector_results)
+
+    def _industry_prompt(self, job_description: str, resume_text: str = None,
+                         retrieved: Dict[str, Dict] = None) -> tuple:
+        """Retrieve and augment for get_intelligent_industry_insights, returning (prompt, max_tokens)"""
         
         # 1. RETRIEVE
-        industry_results = self.industry_collection.query(
-            query_texts=[job_description],
-            n_results=3
-        )
+        retrieved = retrieved or self.batch_query(self._industry_queries(job_description))
+        industry_results = retrieved["industry"]
         
         # 2. AUGMENT
-        context = ""
-        for i, doc in enumerate(industry_results['documents'][0]):
-            metadata = industry_results['metadatas'][0][i]
-            context += f"Industry: {metadata.get('industry', 'N/A')}\n"
-            context += f"Requirements: {doc}\n"
-            context += f"Key Skills: {metadata.get('key_skills', 'N/A')}\n"
-            context += f"Experience Level: {metadata.get('experience_level', 'N/A')}\n"
-            context += f"Salary Range: ${metadata.get('salary_range', 'N/A')}\n"
-            context += f"Growth Trend: {metadata.get('growth_trend', 'N/A')}\n\n"
-        
-        prompt = f"""
-        Based on industry-specific requirements data, provide insights for this job:
-
-        INDUSTRY REQUIREMENTS:
-        {context}
-
-        JOB DESCRIPTION:
-        {job_description}
-
-        {"CANDIDATE RESUME: " + resume_text if resume_text else ""}
-
-        Provide analysis on:
-        1. Industry alignment and fit
-        2. Required vs. preferred skills breakdown
-        3. Experience level expectations
-        4. Salary expectations and market trends
-        5. Career growth opportunities
-        {"6. Candidate's fit assessment" if resume_text else ""}
-
-        Be specific and data-driven in your insights.
-        """
+        context = [
+            f"Industry: {metadata.get('industry', 'N/A')}\n"
+            f"Requirements: {doc}\n"
+            f"Key Skills: {metadata.get('key_skills', 'N/A')}\n"
+            f"Experience Level: {metadata.get('experience_level', 'N/A')}\n"
+            f"Salary Range: ${metadata.get('salary_range', 'N/A')}\n"
+            f"Growth Trend: {metadata.get('growth_trend', 'N/A')}"
+            for doc, metadata in zip(industry_results['documents'][0], industry_results['metadatas'][0])
+        ]
         
-        # 3. GENERATE
-        return self._generate_llm_response(prompt, max_tokens=1200)
+        prompt = (
+            PromptBuilder(PROMPT_BUDGET, name="industry_insights")
+            .add("intro", "Based on industry-specific requirements data, provide insights for this job:")
+            .add_context("industry_requirements", context, heading="INDUSTRY REQUIREMENTS", priority=0)
+            .add("job_description", job_description, heading="JOB DESCRIPTION", priority=2)
+            .add("resume", resume_text, heading="CANDIDATE RESUME", priority=1)
+            .add("task", f"""Provide analysis on:
+1. Industry alignment and fit
+2. Required vs. preferred skills breakdown
+3. Experience level expectations
+4. Salary expectations and market trends
+5. Career growth opportunities
+{"6. Candidate's fit assessment" if resume_text else ""}
+
+Be specific and data-driven in your insights.""")
+            .build()
+        )
+        
+        return prompt, 1200
 
-    def get_resume_optimization_recommendations(self, resume_text: str, job_description: str = None) -> str:
-        """RAG: Best practices for resume optimization"""
+    @staticmethod
+    def _memoized(context: AnalysisContext, section: str, generate) -> str:
+        """Generate a section once per analysis when a context is given"""
+        return context.memoize(section, generate) if context is not None else generate()
+
+    def get_intelligent_industry_insights(self, job_description: str, resume_text: str = None,
+                                          retrieved: Dict[str, Dict] = None, context: AnalysisContext = None) -> str:
+        """RAG: Industry-specific requirements analysis"""
         
-        # 1. RETRIEVE
-        practices_results = self.best_practices_collection.query(
-            query_texts=["resume formatting keywords achievements ATS optimization"],
-            n_results=4
+        # 3. GENERATE
+        return self._memoized(context, "industry_insights", lambda: self._generate_llm_response(
+            *self._industry_prompt(job_description, resume_text, retrieved=retrieved)
+        ))
+
+    def get_resume_best_practices(self, retrieved: Dict[str, Dict] = None) -> List[str]:
+        """RAG: Retrieved resume best-practice documents, formatted as context items without a generation"""
+        retrieved = retrieved or self.batch_query(self._optimization_queries())
+        practices_results = retrieved["practices"]
+        return [
+            f"Category: {metadata.get('category', 'N/A')}\n"
+            f"Best Practice: {doc}\n"
+            f"Importance: {metadata.get('importance', 'N/A')}\n"
+            f"ATS Impact: {metadata.get('ats_impact', 'N/A')}\n"
+            f"Success Rate: {metadata.get('success_rate', 'N/A')}"
+            for doc, metadata in zip(practices_results['documents'][0], practices_results['metadatas'][0])
+        ]
+
+    def _optimization_prompt(self, resume_text: str, job_description: str = None,
+                             retrieved: Dict[str, Dict] = None) -> tuple:
+        """Retrieve and augment for get_resume_optimization_recommendations, returning (prompt, max_tokens)"""
+        
+        # 1. RETRIEVE + 2. AUGMENT
+        practices_context = self.get_resume_best_practices(retrieved=retrieved)
+        
+        prompt = (
+            PromptBuilder(PROMPT_BUDGET, name="optimization_recommendations")
+            .add("intro", "Based on proven resume optimization best practices, analyze and improve this resume:")
+            .add_context("best_practices", practices_context, heading="BEST PRACTICES DATA", priority=0)
+            .add("resume", resume_text, heading="RESUME TO OPTIMIZE", priority=2)
+            .add("job_description", job_description, heading="TARGET JOB", priority=1)
+            .add("task", """Provide specific optimization recommendations for:
+1. Formatting and structure improvements
+2. Keyword optimization strategies
+3. Achievement quantification opportunities
+4. ATS compatibility enhancements
+5. Section-by-section improvements
+
+Include specific examples and before/after suggestions where possible.""")
+            .build()
         )
         
-        # 2. AUGMENT
-        practices_context = ""
-        for i, doc in enumerate(practices_results['documents'][0]):
-            metadata = practices_results['metadatas'][0][i]
-            practices_context += f"Category: {metadata.get('category', 'N/A')}\n"
-            practices_context += f"Best Practice: {doc}\n"
-            practices_context += f"Importance: {metadata.get('importance', 'N/A')}\n"
-            practices_context += f"ATS Impact: {metadata.get('ats_impact', 'N/A')}\n"
-            practices_context += f"Success Rate: {metadata.get('success_rate', 'N/A')}\n\n"
-        
-        prompt = f"""
-        Based on proven resume optimization best practices, analyze and improve this resume:
-
-        BEST PRACTICES DATA:
-        {practices_context}
-
-        RESUME TO OPTIMIZE:
-        {resume_text}
-
-        {"TARGET JOB: " + job_description if job_description else ""}
-
-        Provide specific optimization recommendations for:
-        1. Formatting and structure improvements
-        2. Keyword optimization strategies
-        3. Achievement quantification opportunities  
-        4. ATS compatibility enhancements
-        5. Section-by-section improvements
-
-        Include specific examples and before/after suggestions where possible.
-        """
+        return prompt, 1500
+
+    def get_resume_optimization_recommendations(self, resume_text: str, job_description: str = None,
+                                                retrieved: Dict[str, Dict] = None, context: AnalysisContext = None) -> str:
+        """RAG: Best practices for resume optimization"""
         
         # 3. GENERATE
-        return self._generate_llm_response(prompt, max_tokens=1500)
+        return self._memoized(context, "optimization_recommendations", lambda: self._generate_llm_response(
+            *self._optimization_prompt(resume_text, job_description, retrieved=retrieved)
+        ))
 
-    def get_intelligent_skill_matching(self, resume_skills: List[str], job_description: str) -> str:
-        """RAG: Advanced skill taxonomy and keyword matching"""
+    def _skill_matching_prompt(self, resume_skills: List[str], job_description: str,
+                               retrieved: Dict[str, Dict] = None) -> tuple:
+        """Retrieve and augment for get_intelligent_skill_matching, returning (prompt, max_tokens)"""
         
         # 1. RETRIEVE
-        skills_query = " ".join(list(resume_skills)[:10])  # Limit to avoid token limits
-        skills_results = self.skills_collection.query(
-            query_texts=[skills_query],
-            n_results=5
-        )
+        resume_skills = flatten_skills(resume_skills)
+        retrieved = retrieved or self.batch_query(self._skill_queries(resume_skills, job_description))
+        skills_results = self._hybrid_skill_results(resume_skills, retrieved.get("skills"))
+        industry_results = retrieved["industry"]
+        
+        # 2. AUGMENT
+        skills_context = [
+            f"Skill: {metadata.get('skill', 'N/A')}\n"
+            f"Category: {metadata.get('category', 'N/A')}\n"
+            f"Related Skills: {metadata.get('related_skills', 'N/A')}\n"
+            f"Industry Relevance: {metadata.get('industry_relevance', 'N/A')}\n"
+            f"Demand Level: {metadata.get('demand_level', 'N/A')}\n"
+            f"Salary Impact: {metadata.get('salary_impact', 'N/A')}"
+            for metadata in skills_results['metadatas'][0]
+        ]
+        
+        industry_context = [
+            f"Industry: {metadata.get('industry', 'N/A')}\n"
+            f"Required Skills: {metadata.get('key_skills', 'N/A')}"
+            for metadata in industry_results['metadatas'][0]
+        ]
         
-        industry_results = self.industry_collection.query(
-            query_texts=[job_description],
-            n_results=2
+        prompt = (
+            PromptBuilder(PROMPT_BUDGET, name="skill_matching")
+            .add("intro", "Based on comprehensive skill taxonomy and industry requirements, analyze skill alignment:")
+            .add_context("skill_taxonomy", skills_context, heading="SKILL TAXONOMY DATA", priority=0)
+            .add_context("industry_requirements", industry_context, heading="INDUSTRY REQUIREMENTS", priority=0)
+            .add("candidate_skills", ", ".join(dict.fromkeys(resume_skills)), heading="CANDIDATE SKILLS", priority=2)
+            .add("job_description", job_description, heading="JOB DESCRIPTION", priority=1)
+            .add("task", """Provide detailed analysis on:
+1. Direct skill matches and strength assessment
+2. Adjacent/transferable skills identification
+3. Critical missing skills with priority ranking
+4. Skill development pathway recommendations
+5. Market demand and salary impact analysis
+6. Alternative skill expressions and synonyms to include
+
+Focus on actionable insights for both immediate application and long-term career growth.""")
+            .build()
         )
         
-        # 2. AUGMENT
-        skills_context = ""
-        for i, doc in enumerate(skills_results['documents'][0]):
-            metadata = skills_results['metadatas'][0][i]
-            skills_context += f"Skill: {metadata.get('skill', 'N/A')}\n"
-            skills_context += f"Category: {metadata.get('category', 'N/A')}\n"
-            skills_context += f"Related Skills: {metadata.get('related_skills', 'N/A')}\n"
-            skills_context += f"Industry Relevance: {metadata.get('industry_relevance', 'N/A')}\n"
-            skills_context += f"Demand Level: {metadata.get('demand_level', 'N/A')}\n"
-            skills_context += f"Salary Impact: {metadata.get('salary_impact', 'N/A')}\n\n"
-        
-        industry_context = ""
-        for i, doc in enumerate(industry_results['documents'][0]):
-            metadata = industry_results['metadatas'][0][i]
-            industry_context += f"Industry: {metadata.get('industry', 'N/A')}\n"
-            industry_context += f"Required Skills: {metadata.get('key_skills', 'N/A')}\n\n"
-        
-        prompt = f"""
-        Based on comprehensive skill taxonomy and industry requirements, analyze skill alignment:
-
-        SKILL TAXONOMY DATA:
-        {skills_context}
-
-        INDUSTRY REQUIREMENTS:
-        {industry_context}
-
-        CANDIDATE SKILLS: {', '.join(resume_skills)}
-        JOB DESCRIPTION: {job_description}
-
-        Provide detailed analysis on:
-        1. Direct skill matches and strength assessment
-        2. Adjacent/transferable skills identification  
-        3. Critical missing skills with priority ranking
-        4. Skill development pathway recommendations
-        5. Market demand and salary impact analysis
-        6. Alternative skill expressions and synonyms to include
-
-        Focus on actionable insights for both immediate application and long-term career growth.
-        """
+        return prompt, 1500
+
+    def get_intelligent_skill_matching(self, resume_skills: List[str], job_description: str,
+                                       retrieved: Dict[str, Dict] = None, context: AnalysisContext = None) -> str:
+        """RAG: Advanced skill taxonomy and keyword matching"""
         
         # 3. GENERATE
-        return self._generate_llm_response(prompt, max_tokens=1500)
+        return self._memoized(context, "skill_matching", lambda: self._generate_llm_response(
+            *self._skill_matching_prompt(resume_skills, job_description, retrieved=retrieved)
+        ))
 
-    def get_historical_scoring_insights(self, current_score: int, resume_text: str, job_description: str) -> str:
-        """RAG: Historical scoring patterns analysis"""
+    def _job_industry(self, job_description: str, industry_results: Dict[str, List] = None) -> str:
+        """Industry of the job: the top industry requirements match when already retrieved, else the one the JD names"""
+        if industry_results and industry_results.get("metadatas") and industry_results["metadatas"][0]:
+            return industry_results["metadatas"][0][0].get("industry")
+        return self.pattern_index.match_industry(job_description)
+
+    def _scoring_prompt(self, current_score: int, resume_text: str, job_description: str,
+                        retrieved: Dict[str, Dict] = None, industry_results: Dict[str, List] = None) -> tuple:
+        """Retrieve and augment for get_historical_scoring_insights, returning (prompt, max_tokens)"""
         
         # 1. RETRIEVE
-        patterns_results = self.patterns_collection.query(
-            query_texts=[f"score {current_score} resume patterns"],
-            n_results=3
+        # Numeric range lookup on the interval index for the job's industry, no embedding call
+        industry = self._job_industry(job_description, industry_results)
+        patterns_results = self.pattern_index.as_query_result(
+            self.pattern_index.lookup(current_score, n_results=3, industry=industry)
         )
         
         # 2. AUGMENT
-        patterns_context = ""
-        for i, doc in enumerate(patterns_results['documents'][0]):
-            metadata = patterns_results['metadatas'][0][i]
-            patterns_context += f"Score Range: {metadata.get('score_range', 'N/A')}\n"
-            patterns_context += f"Pattern: {doc}\n"
-            patterns_context += f"Industry: {metadata.get('industry', 'N/A')}\n"
-            patterns_context += f"Improvements: {metadata.get('improvement_suggestions', 'N/A')}\n"
-            patterns_context += f"Sample Size: {metadata.get('sample_size', 'N/A')}\n"
-            patterns_context += f"Success Rate: {metadata.get('success_rate', 'N/A')}\n\n"
-        
-        prompt = f"""
-        Based on historical scoring patterns from similar resumes, provide predictive insights:
-
-        HISTORICAL PATTERNS DATA:
-        {patterns_context}
-
-        CURRENT RESUME SCORE: {current_score}/100
-        RESUME: {resume_text[:1000]}...
-        JOB TARGET: {job_description[:500]}...
-
-        Analyze and predict:
-        1. Score interpretation based on historical data
-        2. Common factors that led to this score range
-        3. Probability of interview callbacks at this score
-        4. Specific improvement strategies proven effective for similar scores
-        5. Expected score improvement timeline with recommended changes
-        6. Industry-specific benchmarking
-
-        Provide data-driven, actionable insights with realistic timelines and expectations.
-        """
+        patterns_context = [
+            f"Score Range: {metadata.get('score_range', 'N/A')}\n"
+            f"Pattern: {doc}\n"
+            f"Industry: {metadata.get('industry', 'N/A')}\n"
+            f"Improvements: {metadata.get('improvement_suggestions', 'N/A')}\n"
+            f"Sample Size: {metadata.get('sample_size', 'N/A')}\n"
+            f"Success Rate: {metadata.get('success_rate', 'N/A')}"
+            for doc, metadata in zip(patterns_results['documents'][0], patterns_results['metadatas'][0])
+        ]
         
-        # 3. GENERATE
-        return self._generate_llm_response(prompt, max_tokens=1500)
-
-    def store_analysis_in_database(self, user_id: int, resume_id: int, job_id: int, 
-                                 ats_score: int, rag_insights: Dict[str, str]) -> int:
-        """Store RAG-enhanced analysis results in database"""
+        prompt = (
+            PromptBuilder(PROMPT_BUDGET, name="scoring_insights")
+            .add("intro", "Based on historical scoring patterns from similar resumes, provide predictive insights:")
+            .add_context("historical_patterns", patterns_context, heading="HISTORICAL PATTERNS DATA", priority=0)
+            .add("current_score", f"{current_score}/100", heading="CURRENT RESUME SCORE")
+            .add("resume", resume_text, heading="RESUME", priority=1, max_tokens=250)
+            .add("job_description", job_description, heading="JOB TARGET", priority=1, max_tokens=125)
+            .add("task", """Analyze and predict:
+1. Score interpretation based on historical data
+2. Common factors that led to this score range
+3. Probability of interview callbacks at this score
+4. Specific improvement strategies proven effective for similar scores
+5. Expected score improvement timeline with recommended changes
+6. Industry-specific benchmarking
+
+Provide data-driven, actionable insights with realistic timelines and expectations.""")
+            .build()
+        )
         
-        session = SessionLocal()
-        try:
-            # Combine all RAG insights into comprehensive feedback and recommendations
-            combined_feedback = f"""
-            INDUSTRY INSIGHTS:
-            {rag_insights.get('industry_insights', 'N/A')}
-
-            OPTIMIZATION RECOMMENDATIONS:
-            {rag_insights.get('optimization_recommendations', 'N/A')}
+        return prompt, 1500
 
-            SKILL ANALYSIS:
-            {rag_insights.get('skill_matching', 'N/A')}
-            """
-            
-            combined_recommendations = f"""
-            HISTORICAL SCORING INSIGHTS:
-            {rag_insights.get('scoring_insights', 'N/A')}
-
-            PRIORITIZED ACTION ITEMS:
-            Based on the analysis above, focus on these key areas for maximum impact.
-            """
-            
-            # Create new score record with RAG-enhanced data
-            score_record = Score(
-                resume_id=resume_id,
-                job_id=job_id,
-                score=ats_score,
-                feedback=combined_feedback,
-                recommendations=combined_recommendations
-            )
-            
-            session.add(score_record)
-            session.commit()
-            
-            return score_record.id
+    def get_historical_scoring_insights(self, current_score: int, resume_text: str, job_description: str,
+                                        retrieved: Dict[str, Dict] = None, context: AnalysisContext = None) -> str:
+        """RAG: Historical scoring patterns analysis"""
         
-        except Exception as e:
-            session.rollback()
-            st.error(f"Error storing RAG analysis: {e}")
-            return None
-        finally:
-            session.close()
+        # 3. GENERATE
+        return self._memoized(context, "scoring_insights", lambda: self._generate_llm_response(
+            *self._scoring_prompt(current_score, resume_text, job_description, retrieved=retrieved)
+        ))
 
     # =============================================================================
-    # INTEGRATED RAG ANALYSIS METHOD (Main Entry Point)
+    # RAG SECTION EXECUTION
     # =============================================================================
     
-    def run_complete_rag_analysis(self, resume_text: str, job_description: str, 
-                                current_score: int, resume_skills: List[str]) -> Dict[str, str]:
+    def _prefetch_sections(self, job_description: str, resume_skills: List[str],
+                           sections: List[str] = None) -> Dict[str, Dict]:
+        """Retrieve context for every embedding-backed section with one batched embedding call"""
+        plan = {
+            "industry_insights": lambda: self._industry_queries(job_description),
+            "optimization_recommendations": self._optimization_queries,
+            "skill_matching": lambda: self._skill_queries(resume_skills, job_description)
+        }
+        plan = {section: queries() for section, queries in plan.items() if sections is None or section in sections}
+        try:
+            combined = self.batch_query({
+                (section, key): request
+                for section, queries in plan.items()
+                for key, request in queries.items()
+            })
+        except Exception as e:
+            # Sections fall back to retrieving on their own
+            print(f"Error prefetching RAG context: {e}")
+            return {}
+        return {
+            section: {key: combined[(section, key)] for key in queries}
+            for section, queries in plan.items()
+        }
+
+    def prefetch_text_sections(self, job_description: str) -> Dict[str, Dict]:
+        """Context for the sections that only need the raw job description, retrievable before resume parsing"""
+        return self._prefetch_sections(job_description, [], sections=["industry_insights", "optimization_recommendations"])
+
+    def _rag_section_prompts(self, resume_text: str, job_description: str, current_score: int,
+                             resume_skills: List[str], prefetched: Dict[str, Dict] = None,
+                             skip: Iterable[str] = ()) -> Dict[str, Any]:
+        """Zero-argument callables building (prompt, max_tokens) for each RAG section not in `skip`, keyed like RAG_SECTIONS"""
+        sections = [section for section in RAG_SECTIONS if section not in skip]
+        prefetched = prefetched or {}
+        missing = [section for section in ("industry_insights", "optimization_recommendations", "skill_matching")
+                   if section in sections and section not in prefetched]
+        retrieved = {**prefetched, **(self._prefetch_sections(job_description, resume_skills, missing) if missing else {})}
+        builders = {
+            "industry_insights": lambda: self._industry_prompt(
+                job_description, resume_text, retrieved=retrieved.get("industry_insights")
+            ),
+            "optimization_recommendations": lambda: self._optimization_prompt(
+                resume_text, job_description, retrieved=retrieved.get("optimization_recommendations")
+            ),
+            "skill_matching": lambda: self._skill_matching_prompt(
+                resume_skills, job_description, retrieved=retrieved.get("skill_matching")
+            ),
+            "scoring_insights": lambda: self._scoring_prompt(
+                current_score, resume_text, job_description, retrieved=retrieved.get("scoring_insights"),
+                industry_results=(retrieved.get("industry_insights") or {}).get("industry")
+            )
+        }
+        return {name: builders[name] for name in sections}
+
+    @staticmethod
+    def _cached_sections(context: AnalysisContext) -> Dict[str, str]:
+        """RAG sections the analysis already has; anything else a stage stored in the context is skipped"""
+        sections = context.sections() if context is not None else {}
+        return {name: sections[name] for name in RAG_SECTIONS if name in sections}
+
+    def stream_complete_rag_analysis(self, resume_text: str, job_description: str,
+                                     current_score: int, resume_skills: List[str],
+                                     max_workers: int = 4, timeout: float = 90, prefetched: Dict[str, Dict] = None,
+                                     context: AnalysisContext = None) -> Iterator[tuple]:
         """
-        Run complete RAG analysis integrating all knowledge base components
-        This is the main method to call from your existing app
+        Stream all RAG sections concurrently as (section, token) events
+        At most `max_workers` sections generate at a time. A (section, None) event marks the end of
+        a section; a section still running `timeout` seconds after it started is ended early.
+        Sections already in `context` are emitted whole, streamed sections are added to it once
+        complete. `prefetched` takes context already retrieved by prefetch_text_sections.
         """
-        
-        st.info("Running intelligent knowledge base analysis...")
-        
-        rag_results = {}
-        
-        with st.spinner("Analyzing industry requirements..."):
-            rag_results['industry_insights'] = self.get_intelligent_industry_insights(
-                job_description, resume_text
-            )
-        
-        with st.spinner("Generating optimization recommendations..."):
-            rag_results['optimization_recommendations'] = self.get_resume_optimization_recommendations(
-                resume_text, job_description
-            )
-        
-        with st.spinner("Performing advanced skill matching..."):
-            rag_results['skill_matching'] = self.get_intelligent_skill_matching(
-                resume_skills, job_description
-            )
-        
-        with st.spinner("Analyzing historical scoring patterns..."):
-            rag_results['scoring_insights'] = self.get_historical_scoring_insights(
-                current_score, resume_text, job_description
-            )
-        
-        return rag_results
\ No newline at end of file
+        cached = self._cached_sections(context)
+        prompts = self._rag_section_prompts(resume_text, job_description, current_score, resume_skills,
+                                            prefetched, skip=cached)
+        events = queue.Queue()
+        started = {}
+        
+        def produce(name, build):
+            started[name] = time.monotonic()
+            parts = []
+            try:
+                for token in self._stream_llm_response(*build()):
+                    parts.append(token)
+                    events.put((name, token))
+                if context is not None:
+                    context.store(name, "".join(parts).strip())
+            except Exception as e:
+                print(f"Error streaming {name}: {e}")
+            finally:
+                events.put((name, None))
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        for name, build in prompts.items():
+            executor.submit(produce, name, build)
+        
+        for name, text in cached.items():
+            yield name, text
+            yield name, None
+        
+        remaining = set(prompts)
+        try:
+            while remaining:
+                try:
+                    name, token = events.get(timeout=0.5)
+                except queue.Empty:
+                    name = None
+                if name in remaining:
+                    if token is None:
+                        remaining.discard(name)
+                    yield name, token
+                # Per-section timeout counts from when the section started, not when it was queued
+                now = time.monotonic()
+                for name in [name for name in remaining if name in started and now - started[name] > timeout]:
+                    remaining.discard(name)
+                    yield name, None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,324 @@
+import re
+
+from datetime import date
+from typing import Any, Dict, Iterable, List
+
+# Fields the ResumeAgent returns, in the order of its system message
+RESUME_FIELDS = ["Name", "Email", "Phone Number", "Skills", "Education", "Experience",
+                 "Certifications", "Summary", "Languages", "Projects", "Publications"]
+
+SECTION_ALIASES = {
+    "Summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about"],
+    "Experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "Education": ["education", "academic background", "education and training", "qualifications",
+                  "academic qualifications"],
+    "Skills": ["skills", "technical skills", "key skills", "core skills", "core competencies",
+               "competencies", "skills and tools", "technologies", "tools and technologies"],
+    "Projects": ["projects", "personal projects", "key projects", "selected projects"],
+    "Certifications": ["certifications", "certificates", "licenses and certifications",
+                       "licenses & certifications", "certifications and licenses"],
+    "Languages": ["languages", "language skills"],
+    "Publications": ["publications", "papers", "research"],
+}
+HEADER_LOOKUP = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+# Sections whose lines are often grouped under sub-headings like "Languages" or "Tools and Technologies"
+LIST_SECTIONS = {"Skills", "Languages", "Certifications"}
+# Fields read from the contact header rather than a section of their own
+HEADER_FIELDS = {"Name", "Email", "Phone Number"}
+# Longest item of a list-like section that is still taken as an item rather than prose
+MAX_ITEM_LENGTH = {"Skills": 40, "Languages": 30, "Certifications": 100, "Education": 150,
+                   "Projects": 200, "Publications": 250}
+MINOR_WORDS = {"and", "&", "of", "/"}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"(?<![\w/])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{1,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]?\d{2,4}){2,3}(?![\w/])")
+LINK_PATTERN = re.compile(r"(?:https?://)?(?:www\.)?((?:linkedin\.com/in|github\.com)/[\w-]+)", re.IGNORECASE)
+HEADER_PATTERN = re.compile(r"^[\W_]*([A-Za-z][A-Za-z &/]{1,40}?)[\s:_-]*$")
+INLINE_HEADER_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*:\s*(\S.*)$")
+YEAR = re.compile(r"(?:19|20)\d{2}")
+LIST_SPLIT = re.compile(r"\s*(?:[,;|•·▪●]|\n|\s-\s)\s*")
+BULLET = re.compile(r"^\s*(?:[-*•·▪●–]|\d+[.)])\s*")
+
+MONTHS = {name: index for index, names in enumerate(
+    [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+     ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"),
+     ("nov", "november"), ("dec", "december")], start=1) for name in names}
+_DATE = r"(?:(?P<{0}m>[A-Za-z]{{3,9}})\.?\s+|(?P<{0}n>\d{{1,2}})[/.-])?(?P<{0}y>(?:19|20)\d{{2}})"
+DATE_RANGE_PATTERN = re.compile(
+    _DATE.format("s") + r"\s*(?:-|–|—|to|until)\s*(?:" + _DATE.format("e") + r"|(?P<now>present|current|now|today))",
+    re.IGNORECASE
+)
+
+def _heading(title: str, current: str) -> str:
+    """Canonical section for a heading-shaped title, or None for prose and sub-headings"""
+    title = re.sub(r"\s+", " ", title.strip())
+    section = HEADER_LOOKUP.get(title.lower())
+    if section is None:
+        return None
+    upper = title.isupper()
+    # Headings are upper- or title-case; "experience in" or "skills gained" style prose is not
+    if not upper and not all(word[0].isupper() or word.lower() in MINOR_WORDS for word in title.split()):
+        return None
+    # Inside a list section, "Languages" or "Tools:" group items rather than start a new section,
+    # unless the line is set in capitals like the main headings
+    if current in LIST_SECTIONS and section in LIST_SECTIONS and not upper:
+        return None
+    return section
+
+def _header(line: str, current: str = "header") -> str:
+    """Canonical section name when the line is a section heading, otherwise None"""
+    if len(line) > 45 or BULLET.match(line):
+        return None
+    match = HEADER_PATTERN.match(line.strip())
+    if not match:
+        return None
+    return _heading(match.group(1), current)
+
+def _inline_header(line: str, current: str):
+    """(section, values) for a "Skills: Python, Java" line that opens a section, otherwise None"""
+    match = INLINE_HEADER_PATTERN.match(line)
+    if not match or BULLET.match(line):
+        return None
+    section = _heading(match.group(1), current)
+    return (section, match.group(2).rstrip()) if section else None
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """Split resume text on recognised headings; text before the first heading is kept as "header" """
+    sections = {"header": []}
+    current = "header"
+    for line in text.splitlines():
+        section = _header(line, current)
+        inline = None if section else _inline_header(line, current)
+        if inline:
+            section, values = inline
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            if inline:
+                sections[current].append(values)
+        elif line.strip():
+            sections[current].append(line.rstrip())
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if any(lines)}
+
+def split_list(text: str) -> List[str]:
+    """Items of a skills/languages style section, with "Category: a, b" prefixes removed"""
+    items = []
+    for line in text.splitlines():
+        line = BULLET.sub("", line)
+        # Sub-headings such as "Languages" group the items below them; they aren't items themselves
+        if line.strip(" :").lower() in HEADER_LOOKUP:
+            continue
+        if ":" in line and len(line.split(":", 1)[0]) < 30:
+            line = line.split(":", 1)[1]
+        items.extend(item.strip(" .") for item in LIST_SPLIT.split(line))
+    return list(dict.fromkeys(item for item in items if item and len(item) <= 60))
+
+def _month(name: str, number: str, default: int) -> int:
+    if name:
+        name = name.lower()
+        return MONTHS.get(name, MONTHS.get(name[:3], default))
+    return int(number) if number and 1 <= int(number) <= 12 else default
+
+def parse_date_ranges(text: str, today: date = None) -> List[Dict[str, Any]]:
+    """Date ranges such as "Jan 2019 - Mar 2021", "03/2020 – Present" or "2016 to 2018" """
+    today = today or date.today()
+    ranges = []
+    for match in DATE_RANGE_PATTERN.finditer(text):
+        start_year = int(match.group("sy"))
+        start_month = _month(match.group("sm"), match.group("sn"), 1)
+        if match.group("now"):
+            end_year, end_month, end = today.year, today.month, "present"
+        else:
+            end_year = int(match.group("ey"))
+            end_month = _month(match.group("em"), match.group("en"), 12)
+            end = f"{end_year}-{end_month:02d}"
+        months = (end_year - start_year) * 12 + end_month - start_month + 1
+        if months > 0:
+            ranges.append({"start": f"{start_year}-{start_month:02d}", "end": end, "months": months})
+    return ranges
+
+def total_months(ranges: List[Dict[str, Any]]) -> int:
+    """Months covered by the ranges, counting overlapping roles once"""
+    spans = sorted(
+        (int(r["start"][:4]) * 12 + int(r["start"][5:]), int(r["start"][:4]) * 12 + int(r["start"][5:]) + r["months"])
+        for r in ranges
+    )
+    covered, end = 0, None
+    for low, high in spans:
+        if end is None or low > end:
+            covered += high - low
+            end = high
+        elif high > end:
+            covered += high - end
+            end = high
+    return covered
+
+def _phone(text: str) -> str:
+    """First phone-number-shaped run of 7-15 digits that isn't a list of years"""
+    for match in PHONE_PATTERN.finditer(text):
+        groups = re.findall(r"\d+", match.group())
+        if all(YEAR.fullmatch(group) for group in groups):
+            continue
+        if 7 <= sum(len(group) for group in groups) <= 15:
+            return match.group().strip()
+    return None
+
+def _name(header: str) -> tuple:
+    """(name, line index) from the first lines of the header, or (None, None)"""
+    for index, line in enumerate(header.splitlines()[:3]):
+        candidate = line.strip()
+        words = candidate.split()
+        if 2 <= len(words) <= 4 and all(re.fullmatch(r"[A-Za-z][A-Za-z.'-]*", word) for word in words):
+            return (candidate.title() if candidate.isupper() else candidate), index
+    return None, None
+
+def _entries(text: str) -> List[str]:
+    """Items of an education/projects style section: one per bullet when bulleted, otherwise one per
+    line, with bulleted or indented lines under a plain entry kept as its details"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    bulleted = bool(lines) and BULLET.match(lines[0]) is not None
+    items = []
+    for line in lines:
+        if items and not bulleted and (line[:1].isspace() or BULLET.match(line)):
+            items[-1] += "; " + BULLET.sub("", line).strip()
+        else:
+            items.append(BULLET.sub("", line).strip())
+    return items
+
+def _experience(text: str) -> List[Dict[str, Any]]:
+    """Roles of an experience section, or None when they can't be told apart reliably
+    A role starts at a non-bulleted line after bullets; it must carry exactly one date range."""
+    roles = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if BULLET.match(line):
+            if not roles:
+                return None
+            roles[-1]["highlights"].append(BULLET.sub("", line).strip())
+        elif not roles or roles[-1]["highlights"]:
+            roles.append({"title": line.strip(), "highlights": []})
+        else:
+            roles[-1]["title"] += " | " + line.strip()
+    for role in roles:
+        ranges = list(DATE_RANGE_PATTERN.finditer(role["title"]))
+        if len(ranges) != 1:
+            return None
+        role["dates"] = ranges[0].group().strip()
+    return roles or None
+
+
+class ResumeFields:
+    """
+    Deterministic pre-extraction result: known fields, the segmented text, and what is still missing
+    Fields in `confident` are final. The others are heuristics the agent confirms or corrects, which
+    only happens for fields whose shape looked off (e.g. a skills "list" of sentences).
+    """
+
+    def __init__(self, fields: Dict[str, Any], sections: Dict[str, str], confident: Iterable[str] = ()):
+        self.fields = fields
+        self.sections = sections
+        self.confident_names = set(confident)
+
+    @property
+    def confident(self) -> Dict[str, Any]:
+        return {name: value for name, value in self.fields.items() if name in self.confident_names}
+
+    @property
+    def tentative(self) -> Dict[str, Any]:
+        return {name: value for name, value in self.fields.items() if name not in self.confident_names}
+
+    @property
+    def segmented(self) -> bool:
+        """Whether the main headings were found, so a section that wasn't found isn't in the resume"""
+        return "Experience" in self.sections and "Education" in self.sections
+
+    def _source(self, field: str) -> str:
+        return "header" if field in HEADER_FIELDS else field
+
+    @property
+    def absent(self) -> List[str]:
+        """Fields a well-segmented resume has no section for"""
+        if not self.segmented:
+            return []
+        return [field for field in RESUME_FIELDS
+                if field not in self.fields and self._source(field) not in self.sections]
+
+    @property
+    def missing(self) -> List[str]:
+        """Fields the agent still has to return, including the tentative ones it should confirm"""
+        return [field for field in RESUME_FIELDS if field not in self.confident_names and field not in self.absent]
+
+    def outline(self, full_text: str) -> str:
+        """Layout summary for judging structure without the full text: headings in order, lines, bullets"""
+        lines = [line for line in full_text.splitlines() if line.strip()]
+        bullets = sum(1 for line in lines if BULLET.match(line))
+        order = " > ".join(name for name in self.sections if name != "header") or "none recognised"
+        return (f"sections in order: {order}; {len(lines)} lines, {bullets} bulleted; "
+                f"longest line {max(map(len, lines), default=0)} chars")
+
+    def merge(self, agent_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Agent output merged with local values: confident ones always win, tentative ones fill gaps"""
+        merged = {field: "" if field in HEADER_FIELDS else [] for field in self.absent}
+        merged.update(self.tentative)
+        merged.update((name, value) for name, value in agent_fields.items() if value or name not in merged)
+        merged.update(self.confident)
+        return merged
+
+    def gap_text(self, full_text: str) -> str:
+        """Only the sections backing the missing fields, or the full text when segmentation found nothing"""
+        # Without the main headings, unrecognised headings may hide content: send everything
+        if not self.segmented:
+            return full_text
+        sources = list(dict.fromkeys(self._source(field) for field in self.missing))
+        return "\n\n".join(
+            self.sections[name] if name == "header" else f"{name.upper()}\n{self.sections[name]}"
+            for name in sources if name in self.sections
+        )
+
+
+def extract_resume_fields(text: str) -> ResumeFields:
+    """Contact details, sections and experience dates without a model call"""
+    sections = segment_sections(text)
+    header = sections.get("header", "")
+    fields = {}
+    confident = set()
+
+    def found(field, value, sure=True):
+        fields[field] = value
+        if sure:
+            confident.add(field)
+
+    name, line = _name(header)
+    if name:
+        # The first line of a resume is the name; further down it may be a job title
+        found("Name", name, sure=line == 0)
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        found("Email", email.group())
+    phone = _phone(header or text)
+    if phone:
+        found("Phone Number", phone)
+    links = list(dict.fromkeys(match.group(1) for match in LINK_PATTERN.finditer(header or text)))
+    if links:
+        found("Links", links)
+
+    for section in ("Skills", "Languages", "Certifications", "Education", "Projects", "Publications"):
+        if section in sections:
+            items = split_list(sections[section]) if section in ("Skills", "Languages") else _entries(sections[section])
+            if items:
+                found(section, items, sure=all(len(item) <= MAX_ITEM_LENGTH[section] for item in items))
+    if "Summary" in sections:
+        found("Summary", " ".join(sections["Summary"].split()))
+
+    experience = sections.get("Experience", "")
+    ranges = parse_date_ranges(experience)
+    if ranges:
+        found("Experience Dates", ranges)
+        found("Years of Experience", round(total_months(ranges) / 12, 1))
+    roles = _experience(experience)
+    if roles:
+        found("Experience", roles)
+    return ResumeFields(fields, sections, confident)
@@ -1,40 +1,43 @@
 import json
 import streamlit as st
-import re
 from typing import Dict, Any
 from rag import RAGKnowledgeBase
+from analysis_context import AnalysisContext
 from process import normalize_data, create_content_hash, get_cached_score, cache_score
+from prompt import PromptBuilder, compact_json
+from json_stream import parse_agent_reply
+
+# Token budget for the scoring prompt; RAG analyses are trimmed before resume/job data
+SCORING_PROMPT_BUDGET = 6000
 
 # Function to score resume with consistent methodology
-def score_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], scoring_agent, coordinator, knowledge_base: RAGKnowledgeBase) -> Dict[str, Any]:
+def score_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], scoring_agent, coordinator, knowledge_base: RAGKnowledgeBase, context: AnalysisContext = None,
+                 prefetched: Dict[str, Dict] = None) -> Dict[str, Any]:
     """Score the resume against the job description with consistency."""
     
     normalized_resume = normalize_data(resume_data)
     normalized_job = normalize_data(job_data)
     #st.write("Hash input string:", f"{json.dumps(normalized_resume, sort_keys=True)}|{json.dumps(normalized_job, sort_keys=True)}")
 
-    content_hash = create_content_hash(resume_data, job_data)
-    #st.write("Content hash for caching:", content_hash)
+    content_hash = create_content_hash(normalized_resume, normalized_job, normalized=True)
 
+    # A hit skips every RAG and scoring model call below
     cached_score = get_cached_score(content_hash)
-    """if cached_score:
-            st.write("Cache hit!")
-            st.write(cached_score)
-            st.success("✅ Retrieved cached score (consistent result)")
-            return cached_score
-    else:
-            st.write("Cache miss. Computing score.")"""
-        
- 
+    if cached_score:
+        st.success("✅ Retrieved cached score (consistent result)")
+        return cached_score
     
     # EXTRACT SKILLS WITH CONSISTENT PROCESSING
     resume_skills = normalized_resume.get("Skills", []) if isinstance(normalized_resume, dict) else []
-    job_description = json.dumps(normalized_job, sort_keys=True, ensure_ascii=True)  # Consistent string representation
-    resume_description = json.dumps(normalized_resume, sort_keys=True, ensure_ascii=True)
+    job_description = compact_json(normalized_job)  # Consistent, minified string representation
+    resume_description = compact_json(normalized_resume)
 
     # GET RAG CONTEXT WITH DETERMINISTIC ORDERING
-    industry_insights = knowledge_base.get_intelligent_industry_insights(job_description, resume_description)
-    skill_analysis = knowledge_base.get_intelligent_skill_matching(resume_skills, job_description)
+    # Industry context retrieved from the raw JD while the resume and JD were being parsed
+    industry_insights = knowledge_base.get_intelligent_industry_insights(
+        job_description, resume_description, retrieved=(prefetched or {}).get("industry_insights"), context=context
+    )
+    skill_analysis = knowledge_base.get_intelligent_skill_matching(resume_skills, job_description, context=context)
     
     # CALCULATE DETERMINISTIC PRELIMINARY SCORE
     job_text = json.dumps(normalized_job, sort_keys=True) if isinstance(normalized_job, dict) else str(normalized_job)
@@ -44,50 +47,50 @@ def score_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], scoring_
     resume_keywords = set(word.lower().strip() for word in resume_text.split() if len(word) > 3 and word.isalpha())
     keyword_overlap = len(job_keywords & resume_keywords)
     
+    # Skill graph credits exact and adjacent skills locally, no generation call needed
+    job_skills = normalized_job.get("skills", []) if isinstance(normalized_job, dict) else []
+    skill_match = knowledge_base.skill_graph.match(resume_skills, job_skills)
+    
     # More sophisticated scoring
     preliminary_score = min(100, (keyword_overlap / max(len(job_keywords), 1)) * 100)
+    if job_skills:
+        preliminary_score = (preliminary_score + skill_match["coverage"] * 100) / 2
     
     historical_insights = knowledge_base.get_historical_scoring_insights(
         preliminary_score, 
         resume_description, 
-        job_description
+        job_description,
+        context=context
     )
     
     # CREATE DETERMINISTIC PROMPT
-    structured_prompt = f"""
-    RAG CONTEXT (DETERMINISTIC ANALYSIS):
-    
-    INDUSTRY ANALYSIS:
-    {industry_insights}
-    
-    SKILL MATCHING ANALYSIS:
-    {skill_analysis}
-    
-    HISTORICAL SCORING PATTERNS:
-    {historical_insights}
-    
-    SCORING TASK:
-    Please score the following resume against the job description.
-    Provide consistent, objective scoring based on:
-    - Exact keyword matches
-    - Required skills alignment
-    - Experience relevance
-    - Education requirements
-    
-    RESUME DATA: {resume_description}
-    
-    JOB DATA: {job_description}
-    
-    IMPORTANT: Provide scoring in this exact JSON format with consistent methodology:
-    {{
-        "overall_score": <integer 0-100>,
-        "keyword_match": <integer 0-100>,
-        "skills_match": <integer 0-100>,
-        "experience_match": <integer 0-100>,
-        "education_match": <integer 0-100>,
-        "recommendations": ["<specific improvement 1>", "<specific improvement 2>"]
-    }}
-    """
+    structured_prompt = (
+        PromptBuilder(SCORING_PROMPT_BUDGET, name="score_resume")
+        .add("intro", "RAG CONTEXT (DETERMINISTIC ANALYSIS):")
+        .add("industry_analysis", industry_insights, heading="INDUSTRY ANALYSIS", priority=2)
+        .add("skill_graph", compact_json(skill_match), heading="SKILL GRAPH MATCH (matched, adjacent, missing)")
+        .add("skill_analysis", skill_analysis, heading="SKILL MATCHING ANALYSIS", priority=1)
+        .add("historical_patterns", historical_insights, heading="HISTORICAL SCORING PATTERNS", priority=0)
+        .add("task", """SCORING TASK:
+Please score the following resume against the job description.
+Provide consistent, objective scoring based on:
+- Exact keyword matches
+- Required skills alignment
+- Experience relevance
+- Education requirements""")
+        .add("resume_data", resume_description, heading="RESUME DATA")
+        .add("job_data", job_description, heading="JOB DATA")
+        .add("format", """IMPORTANT: Provide scoring in this exact JSON format with consistent methodology:
+{
+    "overall_score": <integer 0-100>,
+    "keyword_match": <integer 0-100>,
+    "skills_match": <integer 0-100>,
+    "experience_match": <integer 0-100>,
+    "education_match": <integer 0-100>,
+    "recommendations": ["<specific improvement 1>", "<specific improvement 2>"]
+}""")
+        .build()
+    )
     
     # CONFIGURE LLM FOR CONSISTENCY
     
@@ -102,41 +105,17 @@ def score_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], scoring_
     
     response_text = response.chat_history[-1]['content']
     
-    # PARSE AND VALIDATE RESPONSE
+    # PARSE AND VALIDATE RESPONSE (schema defaults, integer scores, list recommendations, local repair)
     try:
-        # Try to extract JSON from response if it's wrapped in other text
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_text = json_match.group()
-        else:
-            json_text = response_text
-
-        json_data = json.loads(json_text)
+        json_data, incomplete = parse_agent_reply(response_text, "score")
+        if "overall_score" in incomplete:
+            raise ValueError("reply has no overall_score")
         
-        # Ensure all required fields exist with default values
-        required_fields = {
-            "overall_score": 0,
-            "keyword_match": 0,
-            "skills_match": 0,
-            "experience_match": 0,
-            "education_match": 0,
-            "recommendations": []
-        }
+        # 10. CACHE THE RESULT (fallback scores and truncated or partial replies are not cached so the next run retries)
+        if not incomplete:
+            cache_score(content_hash, json_data)
         
-        for field, default in required_fields.items():
-            if field not in json_data:
-                json_data[field] = default
-        
-        # Round scores to avoid floating point variations
-        for score_field in ["overall_score", "keyword_match", "skills_match", "experience_match", "education_match"]:
-            if isinstance(json_data[score_field], (int, float)):
-                json_data[score_field] = round(json_data[score_field])
-        
-        # Ensure recommendations is a list
-        if not isinstance(json_data["recommendations"], list):
-            json_data["recommendations"] = [str(json_data["recommendations"])]
-        
-    except (json.JSONDecodeError, AttributeError) as e:
+    except ValueError as e:
         st.warning(f"Could not parse LLM response as JSON: {e}")
         # Fallback scoring if JSON parsing fails
         json_data = {
@@ -148,9 +127,6 @@ def score_resume(resume_data: Dict[str, Any], job_data: Dict[str, Any], scoring_
             "recommendations": ["Unable to parse detailed analysis"]
         }
     
-    # 10. CACHE THE RESULT
-    cache_score(content_hash, json_data)
-    
     st.success("✅ Successfully scored resume")
     return json_data
 
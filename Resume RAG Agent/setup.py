@@ -6,7 +6,7 @@ import os
 load_dotenv() 
 api_key=os.getenv("OPENAI_API_KEY")
 
-config_list = [
+CONFIG_LIST = [
     {
         "model": "gpt-4o",
         "api_key": api_key,
@@ -15,8 +15,28 @@ config_list = [
     }
 ]
 
-def setup_agents():
-    """Setup the user and assistant agents for the resume analysis."""
+def _config_list(http_client=None):
+    if http_client is not None:
+        return [{**config, "http_client": http_client} for config in CONFIG_LIST]
+    return CONFIG_LIST
+
+def setup_coordinator(name="Coordinator", http_client=None):
+    """Proxy agent that starts chats with the assistant agents; each concurrent stage needs its own,
+    since a proxy keeps per-recipient chat history and reply state."""
+    return UserProxyAgent(
+        name=name,
+        system_message="You are the RAG-enhanced coordinator agent. \
+            Manage the flow of information between the user, resume agent, scoring agent and job description agent and incorporate retrieved knowledge. \
+            Ensure all agents have the necessary data to perform their tasks.",
+        llm_config={"config_list": _config_list(http_client)},
+        human_input_mode="NEVER"
+    )
+
+def setup_agents(http_client=None):
+    """Setup the user and assistant agents for the resume analysis.
+    Pass an httpx client to have every agent's LLM client share its connection pool."""
+    
+    config_list = _config_list(http_client)
     
     resume_agent = AssistantAgent(
         name="ResumeAgent",
@@ -24,7 +44,8 @@ def setup_agents():
             Use the provided RAG context including industry insights and best practices to enhance your analysis. \
             Extract data from resume and return structured JSON with: \
             1. Name 2. Email 3. Phone Number 4. Skills 5. Education 6. Experience\
-            7. Certifications 8. Summary 9. Languages 10. Projects 11. Publications\" \
+            7. Certifications 8. Summary 9. Languages 10. Projects 11. Publications\
+            12. Formatting Issues (list of formatting or structural problems, judged against the best practices provided)\" \
                 Use the provided industry insights and best practices to enhance your analysis. \
                     Be thorough and return all relevant information.\
                         IMPORTANT: Return ONLY the JSON object, no explanations, no markdown, no code blocks.",
@@ -73,13 +94,6 @@ def setup_agents():
         human_input_mode="NEVER"
     )
 
-    coordinator = UserProxyAgent(
-        name="Coordinator",
-        system_message="You are the RAG-enhanced coordinator agent. \
-            Manage the flow of information between the user, resume agent, scoring agent and job description agent and incorporate retrieved knowledge. \
-            Ensure all agents have the necessary data to perform their tasks.",
-        llm_config={"config_list": config_list},
-        human_input_mode="NEVER"
-    )
+    coordinator = setup_coordinator(http_client=http_client)
     
     return resume_agent, scoring_agent, job_agent, improvement_agent, coordinator
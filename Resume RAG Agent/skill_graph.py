@@ -0,0 +1,141 @@
+import re
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, FrozenSet
+
+from lexical import flatten_skills
+
+# Common alternative spellings mapped to one canonical skill name
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp",
+    "google cloud": "gcp",
+    "microsoft azure": "azure",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "sklearn": "scikit-learn",
+    "ci/cd": "cicd",
+    "electronic health records": "ehr",
+    "electronic medical records": "emr",
+}
+
+@lru_cache(maxsize=65536)
+def normalize_skill(name: str) -> str:
+    name = re.sub(r"\s+", " ", str(name).strip().lower())
+    return SKILL_ALIASES.get(name, name)
+
+
+class SkillGraph:
+    """
+    Undirected skill adjacency graph with alias resolution and precomputed closures
+    Closures hold every skill reachable within `depth` hops, so adjacency and relatedness
+    checks are single dict/set lookups
+    """
+
+    def __init__(self, depth: int = 2, aliases: Dict[str, str] = None):
+        self.depth = depth
+        self.aliases = {normalize_skill(alias): normalize_skill(name) for alias, name in (aliases or {}).items()}
+        self.edges = defaultdict(set)
+        self.skill_industries = defaultdict(set)
+        self.closures = {}
+        self.industry_index = {}
+
+    def canonical(self, name: str) -> str:
+        # Already-canonical names skip normalization
+        if name in self.closures:
+            return name
+        name = normalize_skill(name)
+        return self.aliases.get(name, name)
+
+    def add_skill(self, skill: str, related: Iterable[str] = (), industries: Iterable[str] = ()):
+        skill = self.canonical(skill)
+        self.edges[skill]
+        for other in related:
+            other = self.canonical(other)
+            if other != skill:
+                self.edges[skill].add(other)
+                self.edges[other].add(skill)
+        self.skill_industries[skill].update(str(industry).strip() for industry in industries if str(industry).strip())
+
+    def build(self) -> "SkillGraph":
+        """Precompute bounded-depth transitive closures for every skill"""
+        self.closures = {}
+        for skill in self.edges:
+            seen = {skill}
+            frontier = {skill}
+            for _ in range(self.depth):
+                frontier = {neighbour for current in frontier for neighbour in self.edges[current]} - seen
+                if not frontier:
+                    break
+                seen |= frontier
+            seen.discard(skill)
+            self.closures[skill] = frozenset(seen)
+        self.industry_index = {skill: frozenset(industries) for skill, industries in self.skill_industries.items()}
+        return self
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], depth: int = 2) -> "SkillGraph":
+        """Build from skills_data style records or skills collection metadata (comma-joined strings)"""
+        graph = cls(depth=depth)
+        for record in records:
+            if record and record.get("skill"):
+                graph.add_skill(
+                    record["skill"],
+                    flatten_skills(record.get("related_skills", [])),
+                    flatten_skills(record.get("industry_relevance", []))
+                )
+        return graph.build()
+
+    @classmethod
+    def from_collection(cls, collection, depth: int = 2) -> "SkillGraph":
+        return cls.from_records(collection.get(include=["metadatas"])["metadatas"], depth=depth)
+
+    def __contains__(self, skill: str) -> bool:
+        return self.canonical(skill) in self.closures
+
+    def __len__(self) -> int:
+        return len(self.closures)
+
+    def is_adjacent(self, skill: str, other: str) -> bool:
+        """True when `other` is within `depth` hops of `skill`"""
+        return self.canonical(other) in self.closures.get(self.canonical(skill), ())
+
+    def related(self, skill: str) -> FrozenSet[str]:
+        return self.closures.get(self.canonical(skill), frozenset())
+
+    def industries(self, skill: str) -> FrozenSet[str]:
+        return self.industry_index.get(self.canonical(skill), frozenset())
+
+    def match(self, resume_skills: Any, job_skills: Any) -> Dict[str, Any]:
+        """
+        Compare skill lists without a model call
+        Exact (alias-resolved) matches count fully, skills adjacent to a resume skill count half
+        """
+        have = {self.canonical(skill) for skill in flatten_skills(resume_skills)}
+        matched, adjacent, missing = [], {}, []
+        for skill in dict.fromkeys(self.canonical(skill) for skill in flatten_skills(job_skills)):
+            if skill in have:
+                matched.append(skill)
+                continue
+            neighbours = sorted(have & self.related(skill))
+            if neighbours:
+                adjacent[skill] = neighbours
+            else:
+                missing.append(skill)
+        total = len(matched) + len(adjacent) + len(missing)
+        coverage = (len(matched) + 0.5 * len(adjacent)) / total if total else 0.0
+        return {"matched": matched, "adjacent": adjacent, "missing": missing, "coverage": round(coverage, 3)}
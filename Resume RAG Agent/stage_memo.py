@@ -0,0 +1,63 @@
+import json
+import hashlib
+import unicodedata
+
+from typing import Any, Callable, Dict, Tuple
+
+from cache import LRUCache
+from persistence import write_behind
+from db import StageResult, get_stage_result
+
+# Extraction stage results: in-process LRU in front of the stage_results table
+_stage_memory = LRUCache(max_entries=512)
+
+# STAGE MEMOIZATION: an extraction is reused whenever the same text comes back, whatever it's paired with
+def normalize_text(text: str) -> str:
+    """Unicode- and whitespace-normalized text, so re-extracted or re-pasted copies hash the same"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+def stage_key(stage: str, text: str, prompt_version: str) -> str:
+    return hashlib.sha256(f"{stage}|{prompt_version}|{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+def write_stage_result(session, unit):
+    """Write-behind handler for a stage result; an existing row for the same hash is kept"""
+    exists = session.query(StageResult.id).filter_by(stage=unit["stage"], input_hash=unit["input_hash"]).first()
+    if exists is None:
+        session.add(StageResult(
+            stage=unit["stage"],
+            input_hash=unit["input_hash"],
+            prompt_version=unit["prompt_version"],
+            output=unit["output"]
+        ))
+
+write_behind.register("stage_result", write_stage_result)
+
+def memoized_stage(stage: str, text: str, prompt_version: str,
+                   compute: Callable[[], Tuple[Dict[str, Any], bool]]) -> Dict[str, Any]:
+    """
+    Output of `compute()` for this stage input, looked up in memory and the database before running it
+    `compute` returns (result, cacheable); a result is only kept when the stage says its model reply
+    parsed completely, since locally merged values can make a failed parse look populated.
+    """
+    input_hash = stage_key(stage, text, prompt_version)
+    payload = _stage_memory.get(input_hash)
+    if payload is None:
+        try:
+            stored = get_stage_result(stage, input_hash)
+        except Exception as e:
+            print(f"Warning: Could not read stored {stage} result: {e}")
+            stored = None
+        if stored is not None:
+            payload = json.dumps(stored)
+            _stage_memory.set(input_hash, payload)
+    if payload is not None:
+        return json.loads(payload)
+
+    result, cacheable = compute()
+    if cacheable:
+        payload = json.dumps(result)
+        _stage_memory.set(input_hash, payload)
+        write_behind.submit("stage_result", stage=stage, input_hash=input_hash,
+                            prompt_version=prompt_version, output=payload)
+    return result
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import SCHEMAS, StreamingJSONParser, parse_agent_reply
+
+def test_prose_reply_gives_defaults_and_is_incomplete():
+    result, incomplete = parse_agent_reply("I'm sorry, I can't extract that.", "job")
+    assert result == {"skills": [], "qualifications": [], "requirements": []}
+    assert "no object" in incomplete and "skills" in incomplete
+
+def test_missing_comma_keeps_the_other_fields():
+    result, incomplete = parse_agent_reply(
+        '{"skills": ["Python", "SQL"] "qualifications": "BSc"\n"requirements": ["3 years"]}', "job"
+    )
+    assert result == {"skills": ["Python", "SQL"], "qualifications": "BSc", "requirements": ["3 years"]}
+    assert incomplete == []
+
+def test_chunked_reply_with_fence_and_nested_closers():
+    reply = 'Here you go:\n```json\n{"skills": ["Go"], "qualifications": "MSc", "requirements": [{"note": "}"}]}\n```'
+    parser = StreamingJSONParser(SCHEMAS["job"])
+    for start in range(0, len(reply), 4):
+        parser.feed(reply[start:start + 4])
+    assert parser.finish() == {"skills": ["Go"], "qualifications": "MSc", "requirements": [{"note": "}"}]}
+    assert parser.errors == []
+
+def test_truncated_reply_keeps_completed_fields():
+    result, incomplete = parse_agent_reply('{"overall_score": "82%", "keyword_match": 70, "recommendations": ["Add', "score")
+    assert result["overall_score"] == 82 and result["recommendations"] == ["Add"]
+    assert "truncated" in incomplete and "skills_match" in incomplete
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patterns_index import ScoreRangeIndex, parse_score_range
+
+PATTERNS = [
+    ("pattern_tech_high", {"score_range": "85-95", "industry": "Technology"}),
+    ("pattern_tech_medium", {"score_range": "70-84", "industry": "Technology"}),
+    ("pattern_finance_high", {"score_range": "80 to 90", "industry": "Finance"}),
+    ("pattern_general_low", {"score_range": "40–60", "industry": "General"}),
+    ("feedback_1", {"score": 82}),
+]
+
+def build_index() -> ScoreRangeIndex:
+    index = ScoreRangeIndex()
+    for record_id, metadata in PATTERNS:
+        assert index.add_record(record_id, f"document {record_id}", metadata)
+    return index
+
+def ids(entries):
+    return [entry["id"] for entry in entries]
+
+def test_parse_score_range():
+    assert parse_score_range({"score_range": "84-70"}) == (70.0, 84.0)
+    assert parse_score_range({"score_range": "2019 2020"}) is None
+    assert parse_score_range({"score": "77"}) == (77.0, 77.0)
+
+def test_overlapping_filters_by_industry():
+    index = build_index()
+    assert ids(index.overlapping(80, 86)) == ["pattern_tech_medium", "pattern_finance_high", "feedback_1", "pattern_tech_high"]
+    assert ids(index.overlapping(80, 86, industry="Finance")) == ["pattern_finance_high", "feedback_1"]
+    assert ids(index.overlapping(80, 86, industry="technology")) == ["pattern_tech_medium", "feedback_1", "pattern_tech_high"]
+
+def test_lookup_stays_within_industry():
+    index = build_index()
+    # Finance only has one pattern of its own; the rest is topped up from General, never from Technology
+    assert ids(index.lookup(85, n_results=3, industry="Finance")) == ["pattern_finance_high", "feedback_1", "pattern_general_low"]
+    assert ids(index.lookup(75, n_results=1, industry="Technology")) == ["pattern_tech_medium"]
+    # An industry without patterns of its own searches them all
+    assert len(index.lookup(75, n_results=3, industry="Healthcare")) == 3
+
+def test_match_industry():
+    index = build_index()
+    assert index.match_industry("Senior analyst in Finance: finance reporting for a technology firm") == "Finance"
+    assert index.match_industry("Nurse practitioner") is None
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_context import AnalysisContext
+
+RESUME = """Jane Doe
+jane.doe@example.com
+SUMMARY
+Data engineer building batch and streaming pipelines.
+SKILLS
+Python, SQL, Docker
+EXPERIENCE
+Acme Corp, Data Engineer, Jan 2019 - Mar 2021
+EDUCATION
+BSc Computer Science, 2014 - 2018
+"""
+REPLY = json.dumps({"Name": "Jane Doe", "Skills": ["Python", "SQL", "Docker"], "Experience": ["Acme Corp"],
+                    "Education": ["BSc Computer Science"], "Formatting Issues": []})
+
+
+class Reply:
+    def __init__(self, content):
+        self.chat_history = [{"content": content}]
+
+class Coordinator:
+    def initiate_chat(self, agent, message, max_turns):
+        return Reply(REPLY)
+
+class KnowledgeBase:
+    def get_resume_best_practices(self, retrieved=None):
+        return ["Category: Formatting\nBest Practice: Use standard section headings"]
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    for name in ("streamlit", "chromadb", "openai"):
+        pytest.importorskip(name)
+    # db, the score cache and the write-behind journal create their files in the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WRITE_BEHIND_JOURNAL_DIR", str(tmp_path / "journal"))
+    process = importlib.import_module("process")
+    rag = importlib.import_module("rag")
+    monkeypatch.setattr(process, "memoized_stage", lambda stage, text, version, compute: compute()[0])
+    return process, rag
+
+def test_stream_after_fused_extraction_yields_only_rag_sections(modules, monkeypatch):
+    process, rag = modules
+    context = AnalysisContext()
+    process.process_resume(RESUME, object(), Coordinator(), KnowledgeBase(), context, fused=True)
+    # The extraction's best practices are memoized, but not as an insight section
+    assert context.sections() == {}
+
+    knowledge_base = object.__new__(rag.RAGKnowledgeBase)
+    monkeypatch.setattr(knowledge_base, "_rag_section_prompts", lambda *args, skip=(), **kwargs: {
+        name: (lambda: ("prompt", 100)) for name in rag.RAG_SECTIONS if name not in skip
+    })
+    monkeypatch.setattr(knowledge_base, "_stream_llm_response", lambda prompt, max_tokens: iter(["some ", "text"]))
+    context.store("industry_insights", "Stored industry insights")
+
+    events = list(knowledge_base.stream_complete_rag_analysis(RESUME, "Data engineer JD", 70, ["Python"],
+                                                               context=context))
+    assert {name for name, _ in events} == set(rag.RAG_SECTIONS)
+    assert ("industry_insights", "Stored industry insights") in events
+    assert sorted(name for name, token in events if token is None) == sorted(rag.RAG_SECTIONS)
+    assert set(context.sections()) == set(rag.RAG_SECTIONS)
+
+def test_display_after_fused_extraction(modules, monkeypatch):
+    process, rag = modules
+    feedback = importlib.import_module("feedback")
+    context = AnalysisContext()
+    resume_data = process.process_resume(RESUME, object(), Coordinator(), KnowledgeBase(), context, fused=True)
+
+    knowledge_base = object.__new__(rag.RAGKnowledgeBase)
+    monkeypatch.setattr(knowledge_base, "_rag_section_prompts", lambda *args, skip=(), **kwargs: {
+        name: (lambda: ("prompt", 100)) for name in rag.RAG_SECTIONS if name not in skip
+    })
+    monkeypatch.setattr(knowledge_base, "_stream_llm_response", lambda prompt, max_tokens: iter(["insight"]))
+    feedback.st.session_state.score_data = {"overall_score": 70}
+
+    insights = feedback.display_rag_insights(knowledge_base, resume_data, "Data engineer JD",
+                                             context=context, resume_text=RESUME)
+    assert insights == {name: "insight" for name in rag.RAG_SECTIONS}
+
+def test_stream_ends_a_section_that_runs_past_its_timeout(modules, monkeypatch):
+    _, rag = modules
+    knowledge_base = object.__new__(rag.RAGKnowledgeBase)
+    monkeypatch.setattr(knowledge_base, "_rag_section_prompts", lambda *args, skip=(), **kwargs: {
+        name: (lambda name=name: (name, 100)) for name in rag.RAG_SECTIONS
+    })
+
+    def stream(prompt, max_tokens):
+        yield "start "
+        if prompt == "skill_matching":
+            time.sleep(5)
+        yield "end"
+
+    monkeypatch.setattr(knowledge_base, "_stream_llm_response", stream)
+    began = time.monotonic()
+    events = list(knowledge_base.stream_complete_rag_analysis(RESUME, "Data engineer JD", 70, ["Python"],
+                                                               timeout=1))
+    assert time.monotonic() - began < 4
+    assert sorted(name for name, token in events if token is None) == sorted(rag.RAG_SECTIONS)
+    assert [token for name, token in events if name == "skill_matching"] == ["start ", None]
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_fields import extract_resume_fields
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/janedoe
+SUMMARY
+Data engineer building batch and streaming pipelines.
+Skills: Python, SQL, Docker
+EXPERIENCE
+Acme Corp, Data Engineer, Jan 2019 - Mar 2021
+- Built ingestion pipelines
+Beta Inc | Analyst
+Jun 2016 - Dec 2018
+- Weekly reporting
+EDUCATION
+BSc Computer Science, 2014 - 2018
+"""
+
+def test_well_formed_resume_needs_no_agent():
+    fields = extract_resume_fields(RESUME)
+    assert fields.missing == []
+    assert fields.gap_text(RESUME) == ""
+    merged = fields.merge({})
+    assert merged["Skills"] == ["Python", "SQL", "Docker"]
+    assert [role["dates"] for role in merged["Experience"]] == ["Jan 2019 - Mar 2021", "Jun 2016 - Dec 2018"]
+    assert merged["Certifications"] == [] and merged["Phone Number"] == "+1 (555) 123-4567"
+
+def test_only_sections_of_missing_fields_are_sent():
+    text = RESUME.replace("Skills: Python, SQL, Docker",
+                          "Skills: I have worked with Python and many other technologies for years")
+    fields = extract_resume_fields(text)
+    assert fields.missing == ["Skills"]
+    assert fields.gap_text(text) == "SKILLS\nI have worked with Python and many other technologies for years"
+    assert fields.merge({"Skills": ["Python"]})["Skills"] == ["Python"]
+
+def test_year_runs_are_not_phone_numbers():
+    fields = extract_resume_fields("Jane Doe\nVolunteer 2019 2020 2021\n")
+    assert "Phone Number" not in fields.fields
+    # Without the main headings nothing is assumed absent and the whole text goes to the agent
+    assert fields.gap_text("Jane Doe\nVolunteer 2019 2020 2021\n").startswith("Jane Doe")
@@ -0,0 +1,89 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import parse_agent_reply
+from resume_fields import extract_resume_fields
+
+RESUME = """Jane Doe
+jane.doe@example.com | linkedin.com/in/janedoe
+SKILLS
+Python, SQL, Docker
+EXPERIENCE
+Acme Corp, Data Engineer, Jan 2019 - Mar 2021
+EDUCATION
+BSc Computer Science, 2014 - 2018
+"""
+# The agent answered, but not with the fields it was asked for
+PARTIAL_REPLY = 'Here is the analysis: {"Formatting Issues": ["Inconsistent date formats"]}'
+
+def test_parse_agent_reply_reports_failed_and_truncated_replies():
+    result, incomplete = parse_agent_reply(PARTIAL_REPLY, "resume")
+    assert result["Skills"] == []
+    assert {"Name", "Skills", "Experience", "Education"} <= set(incomplete)
+
+    _, incomplete = parse_agent_reply('{"Name": "Jane", "Skills": ["Python"], "Experience": [', "resume")
+    assert "truncated" in incomplete
+
+    _, incomplete = parse_agent_reply(
+        '{"Name": "Jane", "Skills": [], "Experience": [], "Education": [], "Formatting Issues": []}', "resume"
+    )
+    assert incomplete == []
+
+def test_failed_parse_looks_populated_after_local_merge():
+    # Why the storage decision can't be made from the merged result
+    local = extract_resume_fields(RESUME)
+    failed, incomplete = parse_agent_reply(PARTIAL_REPLY, "resume")
+    merged = local.merge(failed)
+    assert incomplete
+    assert merged["Email"] == "jane.doe@example.com" and merged["Skills"] == ["Python", "SQL", "Docker"]
+
+
+@pytest.fixture
+def stage_memo(tmp_path, monkeypatch):
+    pytest.importorskip("sqlalchemy")
+    # db creates its SQLite file and persistence its journal in the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WRITE_BEHIND_JOURNAL_DIR", str(tmp_path / "journal"))
+    module = importlib.import_module("stage_memo")
+    submitted = []
+    monkeypatch.setattr(module, "_stage_memory", module.LRUCache(max_entries=16))
+    monkeypatch.setattr(module, "get_stage_result", lambda stage, input_hash: None)
+    monkeypatch.setattr(module.write_behind, "submit", lambda kind, **unit: submitted.append(unit))
+    module.submitted = submitted
+    return module
+
+def test_failed_parse_is_not_stored(stage_memo):
+    calls = []
+    local = extract_resume_fields(RESUME)
+
+    def compute():
+        calls.append(1)
+        result, incomplete = parse_agent_reply(PARTIAL_REPLY, "resume")
+        return local.merge(result), not incomplete
+
+    first = stage_memo.memoized_stage("resume", RESUME, "test", compute)
+    second = stage_memo.memoized_stage("resume", RESUME, "test", compute)
+    assert first["Email"] == second["Email"] == "jane.doe@example.com"
+    assert len(calls) == 2
+    assert stage_memo.submitted == []
+
+def test_complete_result_is_stored_once(stage_memo):
+    calls = []
+    reply = '{"Name": "Jane Doe", "Skills": ["Python"], "Experience": [], "Education": [], "Formatting Issues": []}'
+
+    def compute():
+        calls.append(1)
+        result, incomplete = parse_agent_reply(reply, "resume")
+        return result, not incomplete
+
+    stage_memo.memoized_stage("resume", RESUME, "test", compute)
+    # Whitespace-only differences hash to the same stage key
+    again = stage_memo.memoized_stage("resume", RESUME.replace("\n", "\n\n"), "test", compute)
+    assert again["Name"] == "Jane Doe"
+    assert len(calls) == 1
+    assert len(stage_memo.submitted) == 1
@@ -0,0 +1,250 @@
+import os
+import glob
+import json
+import uuid
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+from typing import List, Dict, Any, Optional
+
+# Supported storage precisions for the embedding matrix
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+def _atomic_write(path: str, write):
+    """Write through a temp file in the same directory renamed over `path`, so readers never see it half-written"""
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+class NumpyVectorIndex:
+    """Brute-force cosine index over a contiguous embedding matrix"""
+
+    def __init__(self, ids: List[str], matrix: np.ndarray, documents: List[str],
+                 metadata_columns: Dict[str, List[Any]], scales: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.matrix = matrix
+        self.documents = documents
+        self.metadata_columns = metadata_columns
+        self.scales = scales
+
+    @classmethod
+    def build(cls, ids: List[str], embeddings, documents: List[str],
+              metadatas: List[Dict[str, Any]], dtype: str = "float32") -> "NumpyVectorIndex":
+        """Normalize and (optionally) quantize embeddings; metadata is stored column-wise"""
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        scales = None
+        if dtype == "int8":
+            # Symmetric per-row quantization; scores are rescaled at query time
+            scales = np.abs(vectors).max(axis=1).astype(np.float32)
+            scales[scales == 0] = 1
+            matrix = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+            scales = scales / 127
+        else:
+            matrix = vectors.astype(dtype)
+
+        keys = sorted({key for metadata in metadatas for key in (metadata or {})})
+        columns = {key: [(metadata or {}).get(key) for metadata in metadatas] for key in keys}
+        return cls(list(ids), np.ascontiguousarray(matrix), list(documents), columns, scales)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: str, version: Any = None):
+        """
+        Write the matrix as .npy (memory-mappable) and everything else as a JSON sidecar
+        Every save writes new, uniquely named matrix files and then swaps in the sidecar naming them, so
+        processes with the previous matrix memory-mapped keep reading intact pages, and a reader never
+        pairs a new matrix with an old sidecar. Files of earlier saves are removed afterwards.
+        """
+        directory, name = os.path.split(path)
+        os.makedirs(directory or ".", exist_ok=True)
+        generation = uuid.uuid4().hex[:12]
+        files = {"matrix": f"{name}.{generation}.npy"}
+        if self.scales is not None:
+            files["scales"] = f"{name}.{generation}.scales.npy"
+        _atomic_write(os.path.join(directory, files["matrix"]), lambda f: np.save(f, self.matrix))
+        if self.scales is not None:
+            _atomic_write(os.path.join(directory, files["scales"]), lambda f: np.save(f, self.scales))
+        sidecar = json.dumps({
+            "version": version,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadata_columns": self.metadata_columns,
+            "quantized": self.scales is not None,
+            **files
+        })
+        _atomic_write(f"{path}.json", lambda f: f.write(sidecar.encode("utf-8")))
+        remove_index_files(path, keep=files.values())
+
+    @classmethod
+    def load(cls, path: str) -> tuple:
+        """Open a saved index with the matrix memory-mapped, returning (index, version)"""
+        directory, name = os.path.split(path)
+        for attempt in range(2):
+            with open(f"{path}.json", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            try:
+                matrix = np.load(os.path.join(directory, sidecar.get("matrix", f"{name}.npy")), mmap_mode="r")
+                scales = np.load(os.path.join(directory, sidecar.get("scales", f"{name}.scales.npy"))) \
+                    if sidecar["quantized"] else None
+                break
+            except FileNotFoundError:
+                # Another process saved (and cleaned up) between reading the sidecar and the matrix
+                if attempt:
+                    raise
+        index = cls(sidecar["ids"], matrix, sidecar["documents"], sidecar["metadata_columns"], scales)
+        return index, sidecar["version"]
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        return {
+            key: column[row]
+            for key, column in self.metadata_columns.items()
+            if column[row] is not None
+        }
+
+    def search(self, query_embeddings, n_results: int = 3) -> Dict[str, List]:
+        """Top-k by cosine similarity, shaped like a collection.query() response"""
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        response = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        k = min(n_results, len(self))
+        if k == 0:
+            for field in response:
+                response[field] = [[] for _ in range(len(queries))]
+            return response
+
+        # One matrix product scores every document against every query
+        scores = self.matrix.astype(np.float32, copy=False) @ queries.T
+        if self.scales is not None:
+            scores *= self.scales[:, None]
+
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            response["ids"].append([self.ids[row] for row in top])
+            response["documents"].append([self.documents[row] for row in top])
+            response["metadatas"].append([self._metadata(row) for row in top])
+            response["distances"].append([float(1 - column[row]) for row in top])
+        return response
+
+
+def remove_index_files(path: str, keep=()):
+    """Delete the matrix files saved at `path` except `keep`; files still mapped elsewhere may stay behind"""
+    directory, name = os.path.split(path)
+    keep = set(keep)
+    pattern = os.path.join(glob.escape(directory), glob.escape(name))
+    for file in glob.glob(f"{pattern}.npy") + glob.glob(f"{pattern}.*.npy"):
+        if os.path.basename(file) not in keep:
+            try:
+                os.remove(file)
+            except OSError:
+                # Windows refuses while another process has it memory-mapped; the next save retries
+                pass
+
+
+class NumpyCollection:
+    """
+    Collection facade that answers queries from a NumpyVectorIndex
+    Writes and anything else go to the underlying Chroma collection, which stays the source of truth
+    """
+
+    def __init__(self, collection, embedding_function, index_path: str, dtype: str = "float32"):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.index_path = index_path
+        self.dtype = dtype
+        self._index = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def _version(self) -> List[Any]:
+        """Identifies the collection state an index was built from, including its content, so writes that
+        keep the count (re-upserted ids, re-embedded seed records) or bypass this facade are detected"""
+        data = self.collection.get(include=["documents", "metadatas"])
+        content = hashlib.sha256(
+            json.dumps([data["ids"], data["documents"], data["metadatas"]], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return [self.collection.count(), (self.collection.metadata or {}).get("seed_fingerprint"), content, self.dtype]
+
+    def _load_or_build(self) -> NumpyVectorIndex:
+        version = self._version()
+        if os.path.exists(f"{self.index_path}.json"):
+            try:
+                index, saved_version = NumpyVectorIndex.load(self.index_path)
+                if saved_version == version:
+                    return index
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: Could not load vector index {self.index_path}, rebuilding: {e}")
+
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        index = NumpyVectorIndex.build(
+            data["ids"], data["embeddings"], data["documents"], data["metadatas"], dtype=self.dtype
+        )
+        index.save(self.index_path, version=version)
+        # Reopen memory-mapped so worker processes share the page cache copy
+        return NumpyVectorIndex.load(self.index_path)[0]
+
+    @property
+    def index(self) -> NumpyVectorIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = self._load_or_build()
+            return self._index
+
+    def invalidate(self):
+        """Drop the in-memory index and the persisted files, so the next query rebuilds from Chroma"""
+        with self._lock:
+            self._index = None
+            try:
+                os.remove(f"{self.index_path}.json")
+            except FileNotFoundError:
+                pass
+            remove_index_files(self.index_path)
+
+    def add(self, *args, **kwargs):
+        self.collection.add(*args, **kwargs)
+        self.invalidate()
+
+    def upsert(self, *args, **kwargs):
+        self.collection.upsert(*args, **kwargs)
+        self.invalidate()
+
+    def delete(self, *args, **kwargs):
+        self.collection.delete(*args, **kwargs)
+        self.invalidate()
+
+    def query(self, query_texts: List[str] = None, query_embeddings=None, n_results: int = 10,
+              where: Dict = None, include: List[str] = None, **kwargs) -> Dict[str, List]:
+        # Metadata filters are not indexed here, let Chroma handle them
+        if where is not None or kwargs:
+            if include is not None:
+                kwargs["include"] = include
+            return self.collection.query(
+                query_texts=query_texts, query_embeddings=query_embeddings,
+                n_results=n_results, where=where, **kwargs
+            )
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        return self.index.search(query_embeddings, n_results)
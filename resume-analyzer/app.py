@@ -1,4 +1,5 @@
 import streamlit as st
+import io
 import os
 import google.generativeai as genai
 import PyPDF2 as pdf
@@ -6,6 +7,7 @@ import json
 import re
 
 from dotenv import load_dotenv
+from functools import lru_cache
 
 load_dotenv() 
 
@@ -17,14 +19,18 @@ def get_gemini_response(input):
     response = model.generate_content(input)
     return response.text
 
+#Pages past this are ignored, so a pathological upload can't stall the app
+MAX_PAGES = 50
+
+#Cached by file contents, so reruns and re-uploads of the same PDF skip extraction
+@lru_cache(maxsize=32)
+def _pdf_text(data):
+    reader = pdf.PdfReader(io.BytesIO(data))
+    return "".join(str(reader.pages[page].extract_text()) for page in range(min(len(reader.pages), MAX_PAGES)))
+
 #Convert PDF to text
 def input_pdf_text(uploaded_file):
-    reader = pdf.PdfReader(uploaded_file)
-    text = ""
-    for page in range(len(reader.pages)):
-        page = reader.pages[page]
-        text += str(page.extract_text())
-    return text
+    return _pdf_text(uploaded_file.getvalue())
 
 #Display results in human readable format
 def display_results(result):